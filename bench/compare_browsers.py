@@ -0,0 +1,113 @@
+#! /usr/lib/python3.6
+# compare_browsers.py - Launches each browser backend of ms_rewards.py several times against the local stand-in
+# server and reports launch latency, time to first page load and peak memory of the driver's process tree
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+from standin_server import start_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import ms_rewards  # noqa: E402
+
+
+RSS_SAMPLE_SECONDS = 0.1
+
+
+def parse_args():
+    """
+    Parses command line arguments for the comparison
+    :return: argparse object
+    """
+    arg_parser = argparse.ArgumentParser(description='Compares ms_rewards.py browser backends on this host.')
+    arg_parser.add_argument('--runs', type=int, default=5, help='Launches per backend, default is 5.')
+    arg_parser.add_argument('--backends', nargs='+', default=sorted(ms_rewards.BROWSER_BACKENDS),
+                            choices=sorted(ms_rewards.BROWSER_BACKENDS), help='Backends to compare, default is all.')
+    arg_parser.add_argument('--latency', type=float, default=0.0,
+                            help='Seconds added to every stand-in response, default is 0.')
+    arg_parser.add_argument('--lean', action='store_true', default=False, help='Launch in lean mode.')
+    arg_parser.add_argument('--low-memory', action='store_true', dest='low_memory', default=False,
+                            help='Launch in low memory mode.')
+    return arg_parser.parse_args()
+
+
+def sample_peak_rss(browser_obj, stop, peak):
+    """
+    Samples the browser's process tree memory until stop is set
+    :param browser_obj: webdriver obj
+    :param stop: threading.Event
+    :param peak: list holding the peak in bytes
+    :return: None
+    """
+    pid = browser_obj.service.process.pid
+    while not stop.is_set():
+        peak[0] = max(peak[0], ms_rewards.process_tree_rss(pid))
+        stop.wait(RSS_SAMPLE_SECONDS)
+
+
+def measure(base_url):
+    """
+    Launches the current backend once, loads a result page and the dashboard, then quits it
+    :param base_url: String URL of the stand-in server
+    :return: dict of launch and first load seconds and peak rss bytes
+    """
+    started = time.time()
+    browser_obj = ms_rewards.launch_browser(True, ms_rewards.PC_USER_AGENT)
+    launched = time.time()
+    stop = threading.Event()
+    peak = [0]
+    sampler = threading.Thread(target=sample_peak_rss, args=(browser_obj, stop, peak), daemon=True)
+    sampler.start()
+    try:
+        browser_obj.get(f'{base_url}/search?q=benchmark')
+        loaded = time.time()
+        browser_obj.get(f'{base_url}/rewards/dashboard')
+    finally:
+        stop.set()
+        sampler.join()
+        ms_rewards.quit_browser(browser_obj)
+    return {'launch': launched - started, 'first_load': loaded - launched, 'peak_rss': peak[0]}
+
+
+def print_report(results):
+    """
+    Prints mean, min and max of each measurement per backend
+    :param results: dict of backend name to list of measure results
+    :return: None
+    """
+    print(f'\n{"backend":<10}{"launch s":>22}{"first load s":>22}{"peak rss MB":>22}')
+    print(f'{"":<10}' + f'{"mean / min / max":>22}' * 3)
+    for backend, runs in results.items():
+        row = f'{backend:<10}'
+        for key, scale, spec in (('launch', 1, '.2f'), ('first_load', 1, '.2f'), ('peak_rss', 2 ** 20, '.0f')):
+            values = [run[key] / scale for run in runs]
+            row += f'{sum(values) / len(values):>10{spec}} /{min(values):>5{spec}} /{max(values):>5{spec}}'
+        print(row)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    ms_rewards.LEAN_MODE = args.lean
+    ms_rewards.LOW_MEMORY_MODE = args.low_memory
+    # profile templates are written under the working dir, keep them out of the repo
+    os.chdir(tempfile.mkdtemp(prefix='ms_rewards_compare_'))
+    server, base_url = start_server(latency=args.latency)
+    print(f'Stand-in server on {base_url}, latency {args.latency}s')
+
+    results = {}
+    try:
+        for backend in args.backends:
+            ms_rewards.BROWSER_BACKEND = backend
+            results[backend] = []
+            for run in range(args.runs):
+                result = measure(base_url)
+                print(f'{backend} run {run}: launch {result["launch"]:.2f}s, first load {result["first_load"]:.2f}s, '
+                      f'peak rss {result["peak_rss"] / 2 ** 20:.0f} MB')
+                results[backend].append(result)
+    finally:
+        server.shutdown()
+    print_report(results)
@@ -0,0 +1,141 @@
+#! /usr/lib/python3.6
+# run_benchmark.py - Runs ms_rewards.py end to end in headless firefox against the local stand-in server
+# and reports wall time per phase from the run's timing spans, needs no network access
+
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+from standin_server import start_server, endpoints, reset_state
+
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'ms_rewards.py')
+
+
+def parse_args():
+    """
+    Parses command line arguments for the benchmark
+    :return: argparse object
+    """
+    arg_parser = argparse.ArgumentParser(
+        description='Benchmarks ms_rewards.py against a local stand-in server. '
+                    'Arguments after -- are passed on to ms_rewards.py.')
+    arg_parser.add_argument('--runs', type=int, default=3, help='Number of runs, default is 3.')
+    arg_parser.add_argument('--accounts', type=int, default=1, help='Number of fake accounts, default is 1.')
+    arg_parser.add_argument('--latency', type=float, default=0.05,
+                            help='Seconds added to every stand-in response, default is 0.05.')
+    arg_parser.add_argument('--warm', action='store_true', default=False,
+                            help='Reuse one work dir so later runs see saved cookies and caches, default is off.')
+    arg_parser.add_argument('--timeout', type=float, default=900, help='Seconds before a run is killed.')
+    arg_parser.add_argument('--json', dest='json_path', default=None, help='Also write the results to this file.')
+    arg_parser.add_argument('ms_args', nargs=argparse.REMAINDER,
+                            help='ms_rewards.py arguments, default is --mobile --pc --quiz.')
+    return arg_parser.parse_args()
+
+
+def prepare_work_dir(work_dir, base_url, accounts):
+    """
+    Copies ms_rewards.py into a work dir with fake logins and the stand-in endpoints,
+    the script chdirs to its own dir so its logs and caches stay there
+    :param work_dir: String path
+    :param base_url: String URL of the stand-in server
+    :param accounts: Int number of fake accounts
+    :return: String path of the copied script
+    """
+    script_path = os.path.join(work_dir, 'ms_rewards.py')
+    shutil.copy(SCRIPT_PATH, script_path)
+    with open(os.path.join(work_dir, 'ms_rewards_login_dict.json'), 'w') as f:
+        json.dump({f'bench{i}@example.com': 'password' for i in range(accounts)}, f)
+    with open(os.path.join(work_dir, 'endpoints.json'), 'w') as f:
+        json.dump(endpoints(base_url), f)
+    return script_path
+
+
+def span_key(span):
+    """
+    Names a span by its name and its phase, type or source tag
+    :param span: dict of a span from the run metrics json
+    :return: String key
+    """
+    tags = span['tags']
+    tag = tags.get('phase') or tags.get('type') or tags.get('source')
+    return f'{span["name"]}:{tag}' if tag else span['name']
+
+
+def run_once(work_dir, ms_args, timeout):
+    """
+    Runs ms_rewards.py once and sums its spans
+    :param work_dir: String path prepared by prepare_work_dir
+    :param ms_args: list of ms_rewards.py arguments
+    :param timeout: Float seconds before the run is killed
+    :return: dict with wall time, return code and span key -> [count, seconds]
+    """
+    metrics_dir = os.path.join(work_dir, 'logs', 'metrics')
+    before = set(glob.glob(os.path.join(metrics_dir, 'run_*.json')))
+    command = [sys.executable, os.path.join(work_dir, 'ms_rewards.py'), '--headless',
+               '--endpoints', os.path.join(work_dir, 'endpoints.json'), '--min-pace', '0'] + ms_args
+    started = time.time()
+    completed = subprocess.run(command, timeout=timeout)
+    wall = time.time() - started
+
+    spans = defaultdict(lambda: [0, 0.0])
+    new_runs = sorted(set(glob.glob(os.path.join(metrics_dir, 'run_*.json'))) - before)
+    if new_runs:
+        with open(new_runs[-1], 'r') as f:
+            for span in json.load(f)['spans']:
+                total = spans[span_key(span)]
+                total[0] += 1
+                total[1] += span['seconds']
+    return {'wall': wall, 'returncode': completed.returncode, 'spans': dict(spans)}
+
+
+def print_report(results):
+    """
+    Prints mean wall time per span key across runs
+    :param results: list of run_once results
+    :return: None
+    """
+    walls = [result['wall'] for result in results]
+    print(f'\nRuns: {len(results)}  wall mean {sum(walls) / len(walls):.2f}s  '
+          f'min {min(walls):.2f}s  max {max(walls):.2f}s')
+    keys = sorted({key for result in results for key in result['spans']})
+    print(f'{"span":<32}{"count":>8}{"mean s":>10}{"per call s":>12}')
+    for key in keys:
+        counts = [result['spans'].get(key, [0, 0.0])[0] for result in results]
+        seconds = [result['spans'].get(key, [0, 0.0])[1] for result in results]
+        count = sum(counts) / len(results)
+        mean = sum(seconds) / len(results)
+        print(f'{key:<32}{count:>8.1f}{mean:>10.2f}{mean / count if count else 0:>12.3f}')
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    ms_args = [arg for arg in args.ms_args if arg != '--'] or ['--mobile', '--pc', '--quiz']
+    server, base_url = start_server(latency=args.latency)
+    print(f'Stand-in server on {base_url}, latency {args.latency}s')
+
+    results = []
+    warm_dir = tempfile.mkdtemp(prefix='ms_rewards_bench_') if args.warm else None
+    try:
+        for run in range(args.runs):
+            reset_state()
+            work_dir = warm_dir or tempfile.mkdtemp(prefix='ms_rewards_bench_')
+            prepare_work_dir(work_dir, base_url, args.accounts)
+            result = run_once(work_dir, ms_args, args.timeout)
+            print(f'Run {run}: {result["wall"]:.2f}s, exit code {result["returncode"]}, work dir {work_dir}')
+            results.append(result)
+    finally:
+        server.shutdown()
+
+    if results:
+        print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'base_url': base_url, 'latency': args.latency, 'args': ms_args, 'runs': results}, f, indent=2)
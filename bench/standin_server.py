@@ -0,0 +1,418 @@
+#! /usr/lib/python3.6
+# standin_server.py - Local stand-in for the login, Bing, rewards dashboard, point flyout and google trends
+# endpoints used by ms_rewards.py, serves minimal pages with the same IDs and classes, for offline benchmarks
+
+import json
+import time
+import argparse
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+
+POINTS_PER_SEARCH = 5
+MAX_POINTS = {'pc': 150, 'mobile': 100, 'edge': 20}
+OFFER_POINTS = 10
+# offer page name -> dashboard title
+OFFERS = {
+    'poll': 'Daily poll',
+    'lightning': 'Lightning quiz',
+    'drag_and_drop': 'Drag and drop quiz',
+    'click': 'This or that',
+    'explore': 'Explore on Bing',
+}
+TRENDS_TOPICS = 20
+TRENDS_RELATED = 3
+# image thumbnails on each result page, the weight --lean is meant to skip
+THUMBNAILS = 8
+THUMBNAIL_BYTES = 48 * 1024
+
+# account -> {'points': dict of platform points, 'total': int, 'done': set of offer names}
+STATE = {}
+STATE_LOCK = threading.Lock()
+
+COMPLETE_JS = '''
+function complete() {
+    var request = new XMLHttpRequest();
+    request.open('POST', window.location.pathname.replace('/offer/', '/complete/'), true);
+    request.send();
+}
+function closeButton() {
+    return '<div id="quizCompleteContainer">Quiz complete <span class="cico btCloseBack">x</span></div>';
+}
+'''
+
+LIGHTNING_JS = COMPLETE_JS + '''
+var round = 0, rounds = 3;
+function render() {
+    var quiz = document.getElementById('quiz');
+    if (round == rounds) {
+        quiz.innerHTML = closeButton();
+        complete();
+        return;
+    }
+    var html = '<div class="rqQuestion">Lightning question ' + round + '</div>';
+    for (var i = 0; i < 4; i++) {
+        html += '<div class="rqOption" id="rqAnswerOption' + i + '" onclick="answer(this, ' + i + ')">' +
+                'Answer ' + round + '.' + i + '</div>';
+    }
+    quiz.innerHTML = html;
+}
+function answer(option, i) {
+    if (i == (round * 3 + 1) % 4) {
+        option.className += ' correctAnswer';
+        round++;
+        setTimeout(render, 300);
+    } else {
+        option.className += ' wrongAnswer';
+    }
+}
+function start() {
+    document.getElementById('rqStartQuiz').style.display = 'none';
+    render();
+}
+'''
+
+DRAG_AND_DROP_JS = COMPLETE_JS + '''
+var round = 0, rounds = 2, order = [], dragged = null;
+var shuffles = [[3, 0, 4, 1, 2], [2, 3, 1, 0]];
+function render() {
+    var quiz = document.getElementById('quiz');
+    if (round == rounds) {
+        quiz.innerHTML = closeButton();
+        complete();
+        return;
+    }
+    order = shuffles[round].slice();
+    var html = '<div class="rqQuestion">Put these in order ' + round + '</div>';
+    for (var i = 0; i < order.length; i++) {
+        html += '<div class="rqOption" id="rqAnswerOption' + i + '" onmousedown="dragged = ' + i + '"></div>';
+    }
+    quiz.innerHTML = html;
+    mark();
+}
+function mark() {
+    var solved = true;
+    for (var i = 0; i < order.length; i++) {
+        var option = document.getElementById('rqAnswerOption' + i);
+        option.innerHTML = '<span id="rqAnswerOptionNum' + i + '">' + (i + 1) + '</span> Item ' + order[i];
+        option.className = order[i] == i ? 'rqOption correctAnswer' : 'rqOption';
+        solved = solved && order[i] == i;
+    }
+    if (solved) {
+        round++;
+        setTimeout(render, 300);
+    }
+}
+document.onmouseup = function(event) {
+    var target = event.target.closest ? event.target.closest('.rqOption') : null;
+    if (dragged !== null && target) {
+        var i = dragged, j = parseInt(target.id.replace('rqAnswerOption', ''), 10);
+        var swap = order[i];
+        order[i] = order[j];
+        order[j] = swap;
+        mark();
+    }
+    dragged = null;
+};
+function start() {
+    document.getElementById('rqStartQuiz').style.display = 'none';
+    render();
+}
+'''
+
+CLICK_JS = COMPLETE_JS + '''
+var round = 0, rounds = 3, selected = null;
+function render() {
+    var quiz = document.getElementById('quiz');
+    if (round == rounds) {
+        quiz.innerHTML = '<span class="rw_icon">Done</span>';
+        complete();
+        return;
+    }
+    var html = '<div class="wk_question">Click question ' + round + '</div>';
+    for (var i = 0; i < 3; i++) {
+        html += '<div class="wk_Circle" id="wk_option' + i + '" onclick="select(this, ' + i + ')">' +
+                'Choice ' + round + '.' + i + '</div>';
+    }
+    html += '<input type="button" id="check" value="Next" onclick="check()">';
+    quiz.innerHTML = html;
+    selected = null;
+}
+function select(option, i) {
+    selected = i;
+    option.className += ' wk_selected';
+}
+function check() {
+    var correct = document.getElementById('wk_option' + (round % 3));
+    correct.className += ' wk_correctAnswer';
+    round++;
+    setTimeout(render, 300);
+}
+window.onload = render;
+'''
+
+
+def page(title, body, script=''):
+    """
+    Builds a minimal html page
+    :param title: String page title
+    :param body: String html body
+    :param script: String javascript
+    :return: bytes of html page
+    """
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>'
+            f'<script>{script}</script></head><body>{body}</body></html>').encode()
+
+
+def account_state(account):
+    """
+    Gets or creates the point state of an account, call with STATE_LOCK held
+    :param account: String account name
+    :return: dict of account state
+    """
+    if account not in STATE:
+        STATE[account] = {'points': {platform: 0 for platform in MAX_POINTS}, 'total': 1000, 'done': set()}
+    return STATE[account]
+
+
+def reset_state():
+    """
+    Forgets all account points and completed offers
+    :return: None
+    """
+    with STATE_LOCK:
+        STATE.clear()
+
+
+def trends_json(date):
+    """
+    Builds a google trends dailytrends response with terms unique to the date
+    :param date: String of date in year, month, day format
+    :return: String response including the anti json hijacking prefix
+    """
+    searches = [{'title': {'query': f'Topic {date} {i}'},
+                 'relatedQueries': [{'query': f'Topic {date} {i} related {j}'} for j in range(TRENDS_RELATED)]}
+                for i in range(TRENDS_TOPICS)]
+    return ")]}',\n" + json.dumps({'default': {'trendingSearchesDays': [{'trendingSearches': searches}]}})
+
+
+def endpoints(base_url):
+    """
+    Gets the ms_rewards.py --endpoints mapping for a running stand-in server
+    :param base_url: String such as http://127.0.0.1:8000
+    :return: dict of ms_rewards URL constant name to URL
+    """
+    return {
+        'LOGIN_URL': f'{base_url}/login',
+        'BING_SEARCH_URL': f'{base_url}/',
+        'DASHBOARD_URL': f'{base_url}/rewards/dashboard',
+        'POINT_TOTAL_URL': f'{base_url}/rewardsapp/bepflyoutpage?style=chromeextension',
+        'TRENDS_URL': f'{base_url}/trends/api/dailytrends?hl=en-US&ed={{date}}&geo={{geo}}&ns=15',
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """
+    Serves the stand-in pages, each response is delayed by the server's latency
+    """
+    def log_message(self, format_, *args):
+        if self.server.verbose:
+            super().log_message(format_, *args)
+
+    def account(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return unquote(cookie['auth'].value) if 'auth' in cookie else None
+
+    def respond(self, body, status=200, content_type='text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location, headers=None):
+        self.respond(b'', 302, headers=dict(headers or {}, Location=location))
+
+    def form(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        account = self.account()
+
+        if url.path == '/robots.txt':
+            self.respond(b'User-agent: *\nDisallow:\n', content_type='text/plain')
+        elif url.path == '/login':
+            if account:
+                self.redirect('/account')
+            else:
+                self.respond(page('Sign in', '<form method="post" action="/login/password">'
+                                             '<input type="email" name="loginfmt"></form>'))
+        elif url.path == '/account':
+            self.respond(page('Account', '<div id="uhfLogo">Microsoft</div>'))
+        elif url.path in ('/', '/search'):
+            self.do_search(query.get('q'), account)
+        elif url.path == '/rewardsapp/bepflyoutpage':
+            self.do_flyout(account)
+        elif url.path == '/rewards/dashboard':
+            self.do_dashboard(account)
+        elif url.path.startswith('/offer/'):
+            self.do_offer(url.path[len('/offer/'):], account)
+        elif url.path.startswith('/thumb/'):
+            self.respond(bytes(THUMBNAIL_BYTES), content_type='image/jpeg')
+        elif url.path == '/trends/api/dailytrends':
+            self.respond(trends_json(query.get('ed', '')).encode(), content_type='application/json')
+        else:
+            self.respond(page('Not found', 'Not found'), 404)
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        account = self.account()
+
+        if url.path == '/login/password':
+            email_address = self.form().get('loginfmt', '')
+            self.respond(page('Enter password', '<form method="post" action="/login/finish">'
+                                                f'<input type="hidden" name="loginfmt" value="{email_address}">'
+                                                '<input type="password" name="passwd"></form>'))
+        elif url.path == '/login/finish':
+            email_address = self.form().get('loginfmt', '')
+            self.redirect('/account', {'Set-Cookie': f'auth={quote(email_address)}; Path=/'})
+        elif url.path.startswith('/complete/') and account:
+            self.complete_offer(account, url.path[len('/complete/'):])
+            self.respond(b'{}', content_type='application/json')
+        elif url.path == '/__reset':
+            reset_state()
+            self.respond(b'{}', content_type='application/json')
+        else:
+            self.respond(page('Not found', 'Not found'), 404)
+
+    def do_search(self, search_term, account):
+        results = ''
+        if search_term is not None:
+            thumbnails = ''.join(f'<li><img src="/thumb/{quote(search_term)}/{i}.jpg" width="120" height="90"></li>'
+                                 for i in range(THUMBNAILS))
+            results = f'<ol id="b_results"><li>Results for {search_term}</li>{thumbnails}</ol>'
+            if account:
+                user_agent = self.headers.get('User-Agent', '')
+                platforms = ['mobile'] if 'Mobile' in user_agent else ['pc', 'edge'] if 'Edge' in user_agent else ['pc']
+                with STATE_LOCK:
+                    state = account_state(account)
+                    for platform in platforms:
+                        gained = min(POINTS_PER_SEARCH, MAX_POINTS[platform] - state['points'][platform])
+                        state['points'][platform] += gained
+                        state['total'] += gained
+        self.respond(page('Bing', '<a id="id_l" href="/">Sign in</a>'
+                                  '<form action="/search"><input id="sb_form_q" name="q"></form>' + results))
+
+    def do_flyout(self, account):
+        if not account:
+            self.respond(page('Rewards', 'Sign in to see your points'), 401)
+            return
+        with STATE_LOCK:
+            state = account_state(account)
+            points = dict(state['points'])
+            total = state['total']
+        body = f'<div class="credits2">{total:,} of 6,500</div>'
+        for platform in MAX_POINTS:
+            body += f'<div><span class="{platform}search">{points[platform]}/{MAX_POINTS[platform]}</span></div>'
+        self.respond(page('Rewards', body))
+
+    def do_dashboard(self, account):
+        if not account:
+            self.redirect('/login')
+            return
+        with STATE_LOCK:
+            done = set(account_state(account)['done'])
+        cards = ''
+        for name, title in OFFERS.items():
+            icon = 'SkypeCircleCheck' if name in done else 'AddMedium'
+            # icon is nested four levels under the card, like the live dashboard
+            cards += (f'<div class="card"><div><div><div><span class="mee-icon mee-icon-{icon}"></span></div></div>'
+                      f'<a href="/offer/{name}" target="_blank"><ng-transclude>{title}</ng-transclude></a>'
+                      f'</div></div>')
+        self.respond(page('Rewards dashboard', f'<section>{cards}</section>'))
+
+    def do_offer(self, name, account):
+        start = '<div id="rqStartQuiz" onclick="start()">Start quiz</div><div id="quiz"></div>'
+        if name == 'poll':
+            self.respond(page('Poll', '<div id="btoption0" onclick="complete()">Yes</div>'
+                                      '<div id="btoption1" onclick="complete()">No</div>', COMPLETE_JS))
+        elif name == 'lightning':
+            self.respond(page('Lightning quiz', start, LIGHTNING_JS))
+        elif name == 'drag_and_drop':
+            self.respond(page('Drag and drop quiz', start, DRAG_AND_DROP_JS))
+        elif name == 'click':
+            self.respond(page('This or that', '<div id="quiz"></div>', CLICK_JS))
+        elif name == 'explore':
+            # explore offers are credited for the visit
+            if account:
+                self.complete_offer(account, name)
+            self.respond(page('Explore', '<div style="height: 3000px">Explore</div>'))
+        else:
+            self.respond(page('Not found', 'Not found'), 404)
+
+    @staticmethod
+    def complete_offer(account, name):
+        with STATE_LOCK:
+            state = account_state(account)
+            if name in OFFERS and name not in state['done']:
+                state['done'].add(name)
+                state['total'] += OFFER_POINTS
+
+
+class StandinServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, latency=0.0, verbose=False):
+        super().__init__(server_address, StandinHandler)
+        self.latency = latency
+        self.verbose = verbose
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.0, verbose=False):
+    """
+    Starts the stand-in server on a background thread
+    :param host: String interface to bind
+    :param port: Int port, 0 picks a free one
+    :param latency: Float seconds added to every response
+    :param verbose: Boolean, log every request to stderr
+    :return: tuple of server and its base URL
+    """
+    server = StandinServer((host, port), latency, verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description='Local stand-in for the endpoints used by ms_rewards.py')
+    arg_parser.add_argument('--host', default='127.0.0.1', help='Interface to bind, default is 127.0.0.1.')
+    arg_parser.add_argument('--port', type=int, default=8000, help='Port to listen on, default is 8000.')
+    arg_parser.add_argument('--latency', type=float, default=0.0,
+                            help='Seconds added to every response, default is 0.')
+    arg_parser.add_argument('--endpoints', dest='endpoints_path', default=None,
+                            help='Write the ms_rewards.py --endpoints json to this path.')
+    arg_parser.add_argument('--verbose', action='store_true', default=False, help='Log every request.')
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    standin_server, base_url = start_server(args.host, args.port, args.latency, args.verbose)
+    if args.endpoints_path:
+        with open(args.endpoints_path, 'w') as f:
+            json.dump(endpoints(base_url), f, indent=2)
+    print(f'Serving stand-in endpoints on {base_url}, press Ctrl+C to stop.')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin_server.shutdown()
@@ -2,8 +2,6 @@
 # ms_rewards.py - Searches for results via pc bing browser and mobile, completes quizzes on pc bing browser
 # Version 2018.03
 
-# TODO replace sleeps with minimum sleeps for explicit waits to work, especially after a page redirect
-
 # FIXME mobile version does not require re-sign in, but pc version does, why?
 # FIXME Known Cosmetic Issue - logged point total caps out at the point cost of the item on wishlist
 
@@ -16,19 +14,40 @@
 """
 
 import os
+import re
+import zlib
+import hashlib
 import argparse
 import json
 import time
 import random
+import queue
+import pstats
+import cProfile
+import tracemalloc
+import shutil
+import tempfile
 import logging
+import logging.handlers
+import threading
+from html.parser import HTMLParser
+from collections import defaultdict, namedtuple, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 from _datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 
 import requests
+import requests.adapters
 from requests.exceptions import RequestException
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException, TimeoutException, \
     ElementClickInterceptedException, ElementNotVisibleException, \
-    ElementNotInteractableException, NoSuchElementException, UnexpectedAlertPresentException
+    ElementNotInteractableException, NoSuchElementException, UnexpectedAlertPresentException, \
+    StaleElementReferenceException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.common.by import By
@@ -38,9 +57,251 @@ from selenium.webdriver.common.action_chains import ActionChains
 
 
 # URLs
+LOGIN_URL = 'https://login.live.com/'
 BING_SEARCH_URL = 'https://www.bing.com'
 DASHBOARD_URL = 'https://account.microsoft.com/rewards/dashboard'
-POINT_TOTAL_URL = 'http://www.bing.com/rewardsapp/bepflyoutpage?style=chromeextension'
+POINT_TOTAL_URL = 'https://www.bing.com/rewardsapp/bepflyoutpage?style=chromeextension'
+TRENDS_URL = 'https://trends.google.com/trends/api/dailytrends?hl=en-US&ed={date}&geo={geo}&ns=15'
+# URL constants that --endpoints may override, e.g. to point at bench/standin_server.py
+ENDPOINT_NAMES = ('LOGIN_URL', 'BING_SEARCH_URL', 'DASHBOARD_URL', 'POINT_TOTAL_URL', 'TRENDS_URL')
+
+# google trends cache, path is relative to script dir
+TERMS_CACHE_PATH = os.path.join('cache', 'search_terms.json')
+TERMS_CACHE_TTL = 6 * 60 * 60
+# days of trends the search term pool may reach back to, fetched only as newer days run out
+TERM_POOL_DAYS = 7
+# crc32 of every search term handed out today, as packed uint32s in one file per day
+USED_TERMS_DIR = os.path.join('cache', 'used_terms')
+
+# browser backend, a key of BROWSER_BACKENDS
+BROWSER_BACKEND = 'firefox'
+# firefox profile templates, one per set of prefs, copied for each launch instead of zipped by selenium
+PROFILE_TEMPLATE_DIR = os.path.join('cache', 'profiles')
+# (headless, user agent) -> future of a browser launched ahead of time
+warm_browsers = {}
+# lean mode skips resources none of the bot's selectors depend on, element boxes stay laid out from css
+LEAN_MODE = False
+LEAN_PREFS = {
+    # 2 blocks all images, img elements keep their css size so quiz options are still visible and clickable
+    'permissions.default.image': 2,
+    'image.animation_mode': 'none',
+    # 5 blocks audible and inaudible autoplay, preload none stops thumbnails fetching video
+    'media.autoplay.default': 5,
+    'media.preload.default': 0,
+    'media.preload.auto': 0,
+    # icon fonts only draw the glyphs, offers are read from the mee-icon class names
+    'gfx.downloadable_fonts.enabled': False,
+    'browser.display.use_document_fonts': 0,
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'network.http.speculative-parallel-limit': 0,
+}
+# chromium equivalents of the firefox prefs, 2 blocks a content setting
+CHROMIUM_PREFS = {
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+}
+CHROMIUM_LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+}
+CHROMIUM_LEAN_ARGS = ('--blink-settings=imagesEnabled=false', '--autoplay-policy=user-gesture-required')
+CHROMIUM_LOW_MEMORY_ARGS = ('--renderer-process-limit=1', '--disable-features=site-per-process',
+                            '--disk-cache-size=1', '--media-cache-size=1', '--disable-dev-shm-usage')
+# low memory mode for 1gb hosts, one content process, small caches and a short history
+LOW_MEMORY_MODE = False
+LOW_MEMORY_PREFS = {
+    'dom.ipc.processCount': 1,
+    'dom.ipc.processCount.webIsolated': 1,
+    'fission.autostart': False,
+    'browser.tabs.remote.separatePrivilegedContentProcess': False,
+    'browser.cache.disk.enable': False,
+    'browser.cache.memory.capacity': 16384,
+    'browser.sessionhistory.max_entries': 5,
+    'browser.sessionhistory.max_total_viewers': 0,
+    'browser.sessionstore.max_tabs_undo': 0,
+    'javascript.options.mem.gc_incremental_slice_ms': 50,
+    'image.mem.surfacecache.max_size_kb': 32768,
+}
+# rss ceiling in bytes of geckodriver and everything under it, 0 turns the watchdog off
+MAX_RSS = 0
+RSS_SAMPLE_SECONDS = 2.0
+# recycles allowed per phase before the watchdog is ignored for the rest of it
+MAX_RECYCLES = 3
+recycles_left = 0
+# set by the watchdog thread, acted on by the main thread at memory_checkpoint
+recycle_requested = threading.Event()
+watchdog_stop = threading.Event()
+# start_session arguments of the running browser, to relaunch it the same way
+session_args = None
+# third party analytics and ad hosts, resolved to localhost in lean mode so they fail without a round trip
+LEAN_BLOCKED_HOSTS = (
+    'bat.bing.com', 'c.bing.com', 'c.msn.com', 'ads.msn.com', 'c.clarity.ms', 'www.clarity.ms',
+    'browser.events.data.microsoft.com', 'web.vortex.data.microsoft.com', 'mscom.demdex.net',
+    'www.google-analytics.com', 'www.googletagmanager.com', 'connect.facebook.net', 'acdn.adnxs.com',
+)
+
+# saved cookie jars, one per account
+COOKIE_DIR = os.path.join('cache', 'cookies')
+# cookie keys accepted by webdriver add_cookie
+COOKIE_KEYS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')
+
+# minimum seconds between paced actions, explicit waits cover everything else
+MIN_PACE = 2.0
+# call site -> [number of waits, total seconds waited]
+WAIT_STATS = defaultdict(lambda: [0, 0.0])
+
+# what to do when a wait or element action fails at a call site, steps run in order between attempts:
+# retry backs off and tries again, dismiss_alert closes an alert first, navigate loads the url named by
+# url (a global name, so --endpoints applies), abort gives up on the phase once reached
+RecoveryPolicy = namedtuple('RecoveryPolicy', ['steps', 'url'])
+DEFAULT_RECOVERY = RecoveryPolicy(('retry',), None)
+RECOVERY_POLICIES = {
+    # a reload mid login loses what was entered, retry once then give up on the account's portion
+    'loginfmt': RecoveryPolicy(('retry', 'abort'), None),
+    'passwd': RecoveryPolicy(('retry', 'abort'), None),
+    'uhfLogo': RecoveryPolicy(('dismiss_alert',), None),
+    # bing asks for location on some search terms
+    'sb_form_q': RecoveryPolicy(('dismiss_alert', 'navigate'), 'BING_SEARCH_URL'),
+    'id_l': RecoveryPolicy(('dismiss_alert', 'navigate'), 'BING_SEARCH_URL'),
+    'credits2': RecoveryPolicy(('navigate',), 'POINT_TOTAL_URL'),
+    # quiz progress lives in the page, a reload would start the quiz over
+    'check': RecoveryPolicy(('retry', 'retry'), None),
+    'quiz complete': RecoveryPolicy(('retry',), None),
+}
+# seconds slept before a retry, doubling per attempt up to the cap
+RECOVERY_BACKOFF = 0.5
+RECOVERY_BACKOFF_CAP = 8.0
+# attempts after a recovery step wait at most this long, the first attempt waits the full time
+RECOVERY_RETRY_WAIT = 3
+# failed call sites a phase may have before it is aborted
+PHASE_ERROR_BUDGET = 8
+# (account, site, step or failed) -> count
+RECOVERY_COUNTS = defaultdict(int)
+# (account, phase) -> call sites that failed after recovery
+phase_errors = defaultdict(int)
+
+# dashboard cards show an add icon while open and a check icon once completed
+OPEN_OFFER_XPATH = '//span[contains(@class, "mee-icon-AddMedium")]'
+DASHBOARD_ICON_XPATH = '//span[contains(@class, "mee-icon")]'
+
+# point total flyout classes holding the point counts
+POINT_STATUS_CLASSES = ('credits2', 'pcsearch', 'mobilesearch', 'edgesearch')
+# html elements without a closing tag
+VOID_TAGS = ('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr')
+
+# points earned per search on every platform, and searches to try when point status is unreadable
+POINTS_PER_SEARCH = 5
+DEFAULT_SEARCH_LIMIT = {'mobile_search': 20, 'pc_search': 30}
+# stop re-planning searches after this many rounds
+MAX_SEARCH_ROUNDS = 5
+# per search phase dicts of searches issued and points gained
+SEARCH_METRICS = []
+
+# collects every offer type marker of the current page in one round trip
+OFFER_MARKERS_JS = """
+return {
+    sign_in: document.getElementsByClassName('simpleSignIn').length > 0,
+    poll: document.getElementById('btoption0') !== null,
+    start_quiz: document.getElementById('rqStartQuiz') !== null,
+    drag_and_drop: document.getElementById('rqAnswerOptionNum0') !== null,
+    lightning: document.getElementById('rqAnswerOption0') !== null,
+    click: document.getElementsByClassName('wk_Circle').length > 0
+};
+"""
+# type is one of poll, drag_and_drop, lightning, click, explore, or quiz while no quiz layout is recognized
+OfferDescriptor = namedtuple('OfferDescriptor', ['type', 'url', 'title', 'markers'])
+
+# reads drag and drop options in page order, without their position number labels, and their correctAnswer marks
+DRAG_AND_DROP_STATE_JS = """
+var options = document.getElementsByClassName('rqOption');
+var state = {complete: document.getElementById('quizCompleteContainer') !== null, options: []};
+for (var i = 0; i < options.length; i++) {
+    var option = options[i].cloneNode(true);
+    var labels = option.querySelectorAll('[id^="rqAnswerOptionNum"]');
+    for (var j = 0; j < labels.length; j++) {
+        labels[j].parentNode.removeChild(labels[j]);
+    }
+    state.options.push({text: option.textContent.trim(),
+                        correct: (' ' + options[i].className + ' ').indexOf(' correctAnswer ') >= 0});
+}
+return state;
+"""
+# reads a quiz question and its options, arguments are the option class and question css selector
+QUIZ_STATE_JS = """
+var question = document.querySelector(arguments[1]);
+var options = document.getElementsByClassName(arguments[0]);
+var state = {question: question ? question.textContent.trim() : '', options: []};
+for (var i = 0; i < options.length; i++) {
+    state.options.push({text: options[i].textContent.trim(),
+                        correct: /(^|[\\s_])correctAnswer(\\s|$)/.test(options[i].className)});
+}
+return state;
+"""
+# answers to lightning and click quiz questions seen today, shared by all accounts and runs of the day
+QUIZ_ANSWERS_PATH = os.path.join('cache', 'quiz_answers.json')
+quiz_answers = None
+# upper bound on swaps for a whole drag and drop quiz
+MAX_DRAG_AND_DROP_SWAPS = 100
+
+# timing spans and metrics export, path is relative to script dir
+METRICS_DIR = os.path.join('logs', 'metrics')
+SPANS = []
+# account being run, tags spans and search metrics
+current_account = None
+# (account, phase) -> webdriver commands sent, counted by count_round_trips
+ROUND_TRIPS = defaultdict(int)
+# innermost phase span running on the main thread, phase of the round trips
+current_phase = None
+
+# --profile writes a dir per run under the root, PROFILE_DIR is None when profiling is off
+PROFILE_ROOT = os.path.join('logs', 'profile')
+PROFILE_DIR = None
+PROFILED_SPANS = ('phase', 'log_in')
+# allocation sites listed per report and frames kept per allocation
+PROFILE_TOP = 15
+PROFILE_FRAMES = 5
+# one dict per profiled span, for the summary table
+PROFILE_RESULTS = []
+# profiled spans nest, e.g. a log in during a phase's browser recycle, only the outer one is profiled per thread
+profiling = threading.local()
+# webdriver and point status http session of the account being run
+browser = None
+status_session = None
+
+# append-only journal of phases and daily offers completed today, lets an interrupted run resume
+JOURNAL_PATH = os.path.join('cache', 'journal.jsonl')
+# (account, date, phase, offer) tuples read from the journal or recorded this run
+journal = set()
+
+# screenshots of failed lookups, written by a background thread, oldest evicted past the count or size budget
+SCREENSHOT_DIR = os.path.join('logs', 'screenshots')
+SCREENSHOT_MAX_COUNT = 50
+SCREENSHOT_MAX_BYTES = 20 * 1024 * 1024
+# captures waiting for the writer, more are dropped rather than holding up the run
+screenshot_queue = queue.Queue(maxsize=8)
+screenshot_writer = None
+# selectors already captured this run
+screenshot_selectors = set()
+
+# log files rotate by size, one json summary line per account goes to its own file as well
+LOG_PATH = os.path.join('logs', 'ms_rewards.log')
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+SUMMARY_LOG_PATH = os.path.join('logs', 'account_summary.jsonl')
+# writes log records to file on its own thread, fed through a queue by the root logger
+log_listener = None
+# first and latest point total read for the current account
+account_points = {}
+
+# email links are checked concurrently before the browser opens them, a batch of tabs at a time
+EMAIL_LINKS_PATH = 'email_links.txt'
+EMAIL_LINK_WORKERS = 8
+EMAIL_LINK_TIMEOUT = 10
+
+# daemon mode runs every day after the reset hour, launching the browser and fetching terms shortly before
+DAEMON_PREWARM_LEAD = 60
+# next run time and last run result, served as json by the status endpoint
+daemon_status = {'state': 'starting', 'next_run': None, 'last_run': None}
 
 # user agents for edge/pc and mobile
 PC_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
@@ -52,13 +313,83 @@ MOBILE_USER_AGENT = ('Mozilla/5.0 (Windows Phone 10.0; Android 4.2.1; WebView/3.
                      'Chrome/52.0.2743.116 Mobile Safari/537.36 Edge/15.15063')
 
 
+class LevelCounter(logging.Handler):
+    """
+    Counts warning and error records by level, reset for each account summary
+    """
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.counts = defaultdict(int)
+
+    def emit(self, record):
+        self.counts[record.levelname] += 1
+
+
+level_counter = LevelCounter()
+
+
 def init_logging():
+    """
+    Logs through a queue so file writes happen on the listener thread, rotating the log by size
+    :return: None
+    """
+    global log_listener
     # gets dir path of python script, not cwd, for execution on cron
     os.chdir(os.path.dirname(os.path.realpath(__file__)))
     os.makedirs('logs', exist_ok=True)
-    log_path = os.path.join('logs', 'ms_rewards.log')
-    logging.basicConfig(filename=log_path, level=logging.INFO,
-                        format='%(asctime)s :: %(levelname)s :: %(name)s :: %(message)s')
+    file_handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s :: %(levelname)s :: %(name)s :: %(message)s'))
+    summary_handler = logging.handlers.RotatingFileHandler(SUMMARY_LOG_PATH, maxBytes=LOG_MAX_BYTES,
+                                                           backupCount=LOG_BACKUPS)
+    summary_handler.addFilter(logging.Filter('summary'))
+    summary_handler.setFormatter(logging.Formatter('%(message)s'))
+    log_queue = queue.Queue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.addHandler(level_counter)
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, summary_handler)
+    log_listener.start()
+
+
+def stop_logging():
+    """
+    Flushes queued log records to file and stops the listener thread
+    :return: None
+    """
+    if log_listener is not None:
+        log_listener.stop()
+
+
+def log_account_summary(account, started):
+    """
+    Logs one json line for an account with its points before and after, seconds and webdriver round trips per phase,
+    warning counts and recoveries,
+    then resets the counts for the next account
+    :param account: String account name
+    :param started: Float time.time() when the account started
+    :return: dict of the summary
+    """
+    phases = defaultdict(float)
+    for recorded in SPANS:
+        if recorded['account'] == account and recorded['name'] == 'phase':
+            phases[recorded['tags']['phase']] += recorded['seconds']
+    summary = {
+        'account': account,
+        'date': today(),
+        'seconds': round(time.time() - started, 1),
+        'points_before': account_points.get('before'),
+        'points_after': account_points.get('after'),
+        'phases': {phase: round(seconds, 1) for phase, seconds in phases.items()},
+        'round_trips': {phase or 'setup': count for (name, phase), count in ROUND_TRIPS.items() if name == account},
+        'errors': dict(level_counter.counts),
+        'recoveries': {f'{site}:{step}': count for (name, site, step), count in RECOVERY_COUNTS.items()
+                       if name == account},
+    }
+    logging.getLogger('summary').info(msg=json.dumps(summary))
+    account_points.clear()
+    level_counter.counts.clear()
+    return summary
 
 
 def parse_args():
@@ -77,16 +408,69 @@ def parse_args():
                             help='Activates pc quiz search, default is off.')
     arg_parser.add_argument('--email', action='store_true', dest='email_mode', default=False,
                             help='Activates quiz mode, default is off.')
-    return arg_parser.parse_args()
+    arg_parser.add_argument('--geo', dest='geo', default='US',
+                            help='Google trends region for search terms, default is US.')
+    arg_parser.add_argument('--cache-ttl', type=float, dest='cache_ttl', default=TERMS_CACHE_TTL / 3600,
+                            help='Hours cached search terms stay fresh before refetching, default is 6.')
+    arg_parser.add_argument('--min-pace', type=float, dest='min_pace', default=MIN_PACE,
+                            help='Minimum seconds between searches and quiz actions, default is 2.')
+    arg_parser.add_argument('--endpoints', dest='endpoints_path', default=None,
+                            help='JSON file overriding the Microsoft and Google URLs, used for offline benchmarks.')
+    arg_parser.add_argument('--prewarm', action='store_true', dest='prewarm', default=False,
+                            help='Launches the next account\'s browser while the current one runs, default is off.')
+    arg_parser.add_argument('--lean', action='store_true', dest='lean', default=False,
+                            help='Blocks images, media, web fonts and third party trackers, default is off.')
+    arg_parser.add_argument('--low-memory', action='store_true', dest='low_memory', default=False,
+                            help='Tunes firefox for small hosts, one content process and small caches, default is off.')
+    arg_parser.add_argument('--max-rss', type=int, dest='max_rss', default=0,
+                            help='MB of memory the browser may use before it is restarted mid phase, default 0 is off.')
+    arg_parser.add_argument('--email-batch', type=int, dest='email_batch', default=5,
+                            help='Number of email links opened in tabs at once, default is 5.')
+    arg_parser.add_argument('--unattended', action='store_true', dest='unattended', default=False,
+                            help='Opens email links without waiting for a key press, default is off.')
+    arg_parser.add_argument('--daemon', action='store_true', dest='daemon', default=False,
+                            help='Stays running and runs all accounts once a day after the reset hour, default is off.')
+    arg_parser.add_argument('--reset-hour', type=int, dest='reset_hour', default=0,
+                            help='Local hour the daily points reset in daemon mode, default is 0.')
+    arg_parser.add_argument('--run-window', type=float, dest='run_window', default=30,
+                            help='Daemon runs start at a random minute within this many after the reset, default 30.')
+    arg_parser.add_argument('--status-port', type=int, dest='status_port', default=8765,
+                            help='Local port of the daemon status endpoint, 0 turns it off, default is 8765.')
+    arg_parser.add_argument('--browser', dest='browser', choices=('firefox', 'chromium'), default='firefox',
+                            help='Browser to drive, chromium needs chromedriver, default is firefox.')
+    arg_parser.add_argument('--pipeline', action='store_true', dest='pipeline', default=False,
+                            help='Opens all daily offers in tabs at once and solves them as they load, default is off.')
+    arg_parser.add_argument('--profile', action='store_true', dest='profile', default=False,
+                            help='Profiles time and memory of each phase to logs/profile, default is off.')
+    args = arg_parser.parse_args()
+    if args.daemon and args.email_mode and not args.unattended:
+        arg_parser.error('--daemon with --email needs --unattended, no one is there to press a key')
+    return args
+
+
+def set_endpoints(endpoints_path):
+    """
+    Overrides the module URL constants from a json file of constant name to URL
+    :param endpoints_path: String path to json file
+    :return: None
+    """
+    with open(endpoints_path, 'r') as f:
+        endpoints = json.load(f)
+    for name, url in endpoints.items():
+        if name not in ENDPOINT_NAMES:
+            raise ValueError(f'Unknown endpoint {name}, expected one of {", ".join(ENDPOINT_NAMES)}')
+        globals()[name] = url
+        logging.info(msg=f'{name} = {url}')
 
 
-def get_dates():
+def get_dates(days=2):
     """
-    Returns a list of dates from today to 3 days ago in year, month, day format
+    Returns a list of dates from today back to days - 1 days ago in year, month, day format
+    :param days: Int number of dates
     :return: list of string of dates in year, month, day format
     """
     dates = []
-    for i in range(0, 2):
+    for i in range(0, days):
         # get dates
         date = datetime.now() - timedelta(days=i)
         # append in year month date format
@@ -94,577 +478,2248 @@ def get_dates():
     return dates
 
 
-def get_search_terms():
-    dates = get_dates()
-
-    search_terms = []
-    for date in dates:
-        try:
-            # get URL, get api response and parse with json
-            url = f'https://trends.google.com/trends/api/dailytrends?hl=en-US&ed={date}&geo=US&ns=15'
-            request = requests.get(url)
-            response = json.loads(request.text[5:])
-            # get all trending searches with their related queries
-            for topic in response['default']['trendingSearchesDays'][0]['trendingSearches']:
-                search_terms.append(topic['title']['query'].lower())
-                for related_topic in topic['relatedQueries']:
-                    search_terms.append(related_topic['query'].lower())
-            time.sleep(random.randint(3, 5))
-        except RequestException:
-            logging.error('Error retrieving google trends json.')
-        except KeyError:
-            logging.error('Cannot parse, JSON keys are modified.')
-    # get unique terms, return an enumerated list
-    search_terms = set(search_terms)
-    logging.info(msg=f'# of search items: {len(search_terms)}\n')
-    return list(enumerate(search_terms, start=0))
+def load_terms_cache():
+    """
+    Loads the on-disk google trends cache
+    :return: dict of 'geo:date' keys to {'fetched': epoch seconds, 'terms': list of strings}
+    """
+    try:
+        with open(TERMS_CACHE_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
 
-def get_login_info():
+def save_terms_cache(cache):
     """
-    Gets login usernames and passwords from json
-    :return: login dict
+    Writes the google trends cache to a temp file and swaps it in, so a crash never leaves a half written cache.
+    Drops dates older than the term pool reaches back to.
+    :param cache: dict of 'geo:date' keys to cache entries
+    :return: None
     """
-    with open('ms_rewards_login_dict.json', 'r') as f:
-        return json.load(f)
+    oldest = get_dates(TERM_POOL_DAYS)[-1]
+    cache = {key: entry for key, entry in cache.items() if key.rpartition(':')[2] >= oldest}
+    os.makedirs(os.path.dirname(TERMS_CACHE_PATH), exist_ok=True)
+    tmp_path = f'{TERMS_CACHE_PATH}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, TERMS_CACHE_PATH)
 
 
-def browser_setup(headless_mode, user_agent):
+def fetch_trends(session, date, geo):
     """
-    Inits the firefox browser with headless setting and user agent
-    :param headless_mode: Boolean
-    :param user_agent: String
-    :return: webdriver obj
+    Gets all trending searches with their related queries for a single date
+    :param session: requests.Session shared by all fetches
+    :param date: String of date in year, month, day format
+    :param geo: String of google trends region code
+    :return: list of lowercase search terms
     """
-    options = Options()
-    options.headless = headless_mode
-    profile = webdriver.FirefoxProfile()
-    profile.set_preference('general.useragent.override', user_agent)
-    # experimental disable notifications
-    profile.set_preference('dom.webnotifications.serviceworker.enabled', False)
-    profile.set_preference('dom.webnotifications.enabled', False)
-    profile.set_preference('geo.enabled', False)
-    firefox_browser_obj = webdriver.Firefox(options=options, firefox_profile=profile)
-    return firefox_browser_obj
+    request = session.get(TRENDS_URL.format(date=date, geo=geo), timeout=15)
+    request.raise_for_status()
+    # response is prefixed with 5 junk chars to prevent json hijacking
+    response = json.loads(request.text[5:])
+    terms = []
+    for topic in response['default']['trendingSearchesDays'][0]['trendingSearches']:
+        terms.append(topic['title']['query'].lower())
+        for related_topic in topic['relatedQueries']:
+            terms.append(related_topic['query'].lower())
+    return terms
+
+
+def update_terms_cache(dates, geo='US', ttl=TERMS_CACHE_TTL):
+    """
+    Fetches expired or missing dates of the trends cache concurrently.
+    Falls back to stale cached terms for a date if it cannot be fetched.
+    :param dates: list of string of dates in year, month, day format
+    :param geo: String of google trends region code
+    :param ttl: Number of seconds a cached date stays fresh
+    :return: dict of trends cache, see load_terms_cache
+    """
+    cache = load_terms_cache()
+    now = time.time()
+    keys = {date: f'{geo}:{date}' for date in dates}
+    stale_dates = [date for date in dates
+                   if keys[date] not in cache or now - cache[keys[date]]['fetched'] > ttl]
+    logging.info(msg=f'Trends cache hits: {len(dates) - len(stale_dates)}/{len(dates)}')
+
+    if stale_dates:
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=len(stale_dates))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            with ThreadPoolExecutor(max_workers=len(stale_dates)) as executor:
+                futures = {date: executor.submit(fetch_trends, session, date, geo) for date in stale_dates}
+                for date, future in futures.items():
+                    try:
+                        terms = future.result()
+                    except RequestException:
+                        logging.error(f'Error retrieving google trends json for {date}.')
+                    except (KeyError, IndexError, ValueError):
+                        logging.error(f'Cannot parse google trends json for {date}, JSON keys are modified.')
+                    else:
+                        cache[keys[date]] = {'fetched': now, 'terms': terms}
+                        continue
+                    # network or parse failure, fall back on whatever is cached for the date
+                    if keys[date] in cache:
+                        logging.info(msg=f'Using stale cached terms for {date}.')
+                    else:
+                        logging.info(msg=f'No cached terms to fall back on for {date}.')
+        try:
+            save_terms_cache(cache)
+        except OSError:
+            logging.exception(msg='Error writing google trends cache.')
+    return cache
 
 
-def log_in(email_address, pass_word):
-    logging.info(msg=f'Logging in {email_address}...')
-    browser.get('https://login.live.com/')
-    time.sleep(0.5)
-    # wait for login form and enter email
-    wait_until_clickable(By.NAME, 'loginfmt', 10)
-    send_key_by_name('loginfmt', email_address)
-    time.sleep(0.5)
-    send_key_by_name('loginfmt', Keys.RETURN)
-    logging.debug(msg='Sent Email Address.')
-    # wait for password form and enter password
-    time.sleep(0.5)
-    wait_until_clickable(By.NAME, 'passwd', 10)
-    send_key_by_name('passwd', pass_word)
-    logging.debug(msg='Sent Password.')
-    # wait for 'sign in' button to be clickable and sign in
-    time.sleep(0.1)
-    send_key_by_name('passwd', Keys.RETURN)
-    time.sleep(1)
-    wait_until_visible(By.ID, 'uhfLogo', 10)
-    time.sleep(2)
+def load_used_terms():
+    """
+    Loads the crc32 of search terms handed out today and deletes the files of earlier days
+    :return: set of Int crc32
+    """
+    os.makedirs(USED_TERMS_DIR, exist_ok=True)
+    used = array('I')
+    for file_name in os.listdir(USED_TERMS_DIR):
+        path = os.path.join(USED_TERMS_DIR, file_name)
+        if file_name == f'{today()}.bin':
+            with open(path, 'rb') as f:
+                data = f.read()
+            # ignore a torn last entry
+            used.frombytes(data[:len(data) - len(data) % used.itemsize])
+        else:
+            os.remove(path)
+    return set(used)
+
+
+def iter_term_pool(cache, used, geo='US', ttl=TERMS_CACHE_TTL):
+    """
+    Generator of numbered search terms that no account has searched today, each term is handed out once,
+    so accounts sharing the generator get non overlapping terms. Older days of trends are fetched only
+    when the newer ones run out.
+    :param cache: dict of trends cache, see load_terms_cache
+    :param used: set of Int crc32 of terms handed out today, see load_used_terms
+    :param geo: String of google trends region code
+    :param ttl: Number of seconds a cached date stays fresh
+    :return: generator of (Int, String) tuples with search terms
+    """
+    num = 0
+    with open(os.path.join(USED_TERMS_DIR, f'{today()}.bin'), 'ab', buffering=0) as used_file:
+        for date in get_dates(TERM_POOL_DAYS):
+            key = f'{geo}:{date}'
+            if key not in cache:
+                # pool ran low, refill from an older day
+                cache = update_terms_cache([date], geo, ttl)
+            terms = cache.get(key, {}).get('terms', [])
+            logging.info(msg=f'# of search items for {date}: {len(terms)}')
+            for term in terms:
+                term_crc = zlib.crc32(term.encode())
+                if term_crc in used:
+                    continue
+                used.add(term_crc)
+                used_file.write(array('I', [term_crc]).tobytes())
+                yield num, term
+                num += 1
+    logging.info(msg=f'Search term pool exhausted after {num} terms.')
+
+
+def get_search_terms(geo='US', ttl=TERMS_CACHE_TTL):
+    """
+    Gets today's and yesterday's trends into the cache and returns the search term pool over them
+    :param geo: String of google trends region code
+    :param ttl: Number of seconds a cached date stays fresh
+    :return: generator of (Int, String) tuples with search terms, see iter_term_pool
+    """
+    used = load_used_terms()
+    cache = update_terms_cache(get_dates(), geo, ttl)
+    logging.info(msg=f'{len(used)} search terms already used today.')
+    return iter_term_pool(cache, used, geo, ttl)
 
 
-def find_by_id(obj_id):
+def fetch_search_terms(geo='US', ttl=TERMS_CACHE_TTL):
     """
-    Searches for elements matching ID
-    :param obj_id:
-    :return: List of all nodes matching provided ID
+    Runs get_search_terms as a timed phase, for use on a background thread
+    :param geo: String of google trends region code
+    :param ttl: Number of seconds a cached date stays fresh
+    :return: generator of (Int, String) tuples with search terms, see iter_term_pool
     """
-    return browser.find_elements_by_id(obj_id)
+    with span('phase', phase='search_terms'):
+        return get_search_terms(geo, ttl)
 
 
-def find_by_xpath(selector):
+def iter_when_ready(future):
     """
-    Finds elements by xpath
-    :param selector: xpath string
-    :return: returns a list of all matching selenium objects
+    Generator over the search terms of a future, only blocks on the future when the first term is needed
+    :param future: concurrent.futures.Future of a search term generator
+    :return: generator of (Int, String) tuples with search terms
     """
-    return browser.find_elements_by_xpath(selector)
+    started = time.time()
+    search_terms = future.result()
+    record_wait('search terms', started)
+    yield from search_terms
 
 
-def find_by_class(selector):
+def prefetch_search_terms(geo='US', ttl=TERMS_CACHE_TTL):
     """
-    Finds elements by class name
-    :param selector: Class selector of html obj
-    :return: returns a list of all matching selenium objects
+    Starts getting search terms on a background thread, so the fetch overlaps browser startup and login
+    :param geo: String of google trends region code
+    :param ttl: Number of seconds a cached date stays fresh
+    :return: generator of (Int, String) tuples with search terms, see iter_when_ready
     """
-    return browser.find_elements_by_class_name(selector)
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(fetch_search_terms, geo, ttl)
+    executor.shutdown(wait=False)
+    return iter_when_ready(future)
 
 
-def find_by_css(selector):
+def today():
     """
-    Finds nodes by css selector
-    :param selector: CSS selector of html node obj
-    :return: returns a list of all matching selenium objects
+    Gets today's date in year, month, day format
+    :return: String
     """
-    return browser.find_elements_by_css_selector(selector)
+    return datetime.now().strftime('%Y%m%d')
 
 
-def wait_until_visible(by_, selector, time_to_wait=10):
+def load_journal():
     """
-    Wait until all objects matching selector are visible
-    :param by_: Select by ID, XPATH, CSS Selector, other, from By module
-    :param selector: string of selector
-    :param time_to_wait: Int time to wait
-    :return: None
+    Reads today's completed entries from the journal and rewrites it with just those
+    :return: set of (account, date, phase, offer) tuples
     """
+    entries = set()
     try:
-        WebDriverWait(browser, time_to_wait).until(ec.visibility_of_element_located((by_, selector)))
-    except (TimeoutException, UnexpectedAlertPresentException):
-        logging.exception(msg=f'{selector} element Not Visible - Timeout Exception', exc_info=False)
-        screenshot(selector)
-        browser.refresh()
-    except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for {selector} object')
-        screenshot(selector)
-        browser.refresh()
+        with open(JOURNAL_PATH, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a torn last line from a crash mid write
+                    continue
+                if entry['date'] == today():
+                    entries.add((entry['account'], entry['date'], entry['phase'], entry.get('offer')))
+    except OSError:
+        return entries
+    # compact, swapping in the new file so a crash never loses entries
+    with open(f'{JOURNAL_PATH}.tmp', 'w') as f:
+        for account, date, phase, offer in sorted(entries, key=str):
+            f.write(json.dumps({'account': account, 'date': date, 'phase': phase, 'offer': offer}) + '\n')
+    os.replace(f'{JOURNAL_PATH}.tmp', JOURNAL_PATH)
+    return entries
+
+
+def journal_done(account, phase, offer=None):
+    """
+    Checks the journal for a phase or daily offer completed today
+    :param account: String account name
+    :param phase: String phase name
+    :param offer: String offer title for dailies, None for whole phases
+    :return: Boolean
+    """
+    return (account, today(), phase, offer) in journal
 
 
-def wait_until_clickable(by_, selector, time_to_wait=10):
+def record_done(account, phase, offer=None):
     """
-    Waits 5 seconds for element to be clickable
-    :param by_:  BY module args to pick a selector
-    :param selector: string of xpath, css_selector or other
-    :param time_to_wait: Int time to wait
+    Appends a completed phase or daily offer to the journal as a single write, synced to disk
+    :param account: String account name
+    :param phase: String phase name
+    :param offer: String offer title for dailies, None for whole phases
     :return: None
     """
+    entry = (account, today(), phase, offer)
+    line = json.dumps({'account': account, 'date': entry[1], 'phase': phase, 'offer': offer}) + '\n'
+    os.makedirs(os.path.dirname(JOURNAL_PATH), exist_ok=True)
+    fd = os.open(JOURNAL_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
     try:
-        WebDriverWait(browser, time_to_wait).until(ec.element_to_be_clickable((by_, selector)))
-    except (TimeoutException, UnexpectedAlertPresentException):
-        logging.exception(msg=f'{selector} element Not clickable - Timeout Exception', exc_info=False)
-        screenshot(selector)
-        browser.refresh()
-    except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for {selector} object')
-        screenshot(selector)
-        browser.refresh()
+        os.write(fd, line.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    journal.add(entry)
 
 
-def send_key_by_name(name, key):
+def get_login_info():
     """
-    Sends key to target found by name
-    :param name: Name attribute of html object
-    :param key: Key to be sent to that object
-    :return: None
+    Gets login usernames and passwords from json
+    :return: login dict
     """
-    try:
-        browser.find_element_by_name(name).send_keys(key)
-    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
-        logging.exception(msg=f'Send key by name to {name} element not visible or clickable.')
-    except NoSuchElementException:
-        logging.exception(msg=f'Send key to {name} element, no such element.')
-        screenshot(name)
-        browser.refresh()
-    except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for send key to {name} object')
+    with open('ms_rewards_login_dict.json', 'r') as f:
+        return json.load(f)
 
 
-def send_key_by_id(obj_id, key):
+def firefox_prefs(user_agent):
     """
-    Sends key to target found by id
-    :param obj_id: ID attribute of the html object
-    :param key: Key to be sent to that object
-    :return: None
+    Gets the firefox preferences for a user agent, plus the low memory and resource blocking ones when enabled
+    :param user_agent: String
+    :return: dict of preference name to value
     """
-    try:
-        browser.find_element_by_id(obj_id).send_keys(key)
-    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
-        logging.exception(msg=f'Send key by ID to {obj_id} element not visible or clickable.')
-    except NoSuchElementException:
-        logging.exception(msg=f'Send key by ID to {obj_id} element, no such element')
-        screenshot(obj_id)
-        browser.refresh()
-    except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for send key by ID to {obj_id} object')
+    prefs = {
+        'general.useragent.override': user_agent,
+        # experimental disable notifications
+        'dom.webnotifications.serviceworker.enabled': False,
+        'dom.webnotifications.enabled': False,
+        'geo.enabled': False,
+    }
+    if LOW_MEMORY_MODE:
+        prefs.update(LOW_MEMORY_PREFS)
+    if LEAN_MODE:
+        prefs.update(LEAN_PREFS)
+        prefs['network.dns.localDomains'] = ','.join(LEAN_BLOCKED_HOSTS)
+    return prefs
+
+
+def profile_template(prefs):
+    """
+    Gets the template profile dir for a set of preferences, writing its user.js the first time
+    :param prefs: dict of preference name to value
+    :return: String path to template dir
+    """
+    prefs_json = json.dumps(prefs, sort_keys=True)
+    template_dir = os.path.join(PROFILE_TEMPLATE_DIR, hashlib.sha1(prefs_json.encode()).hexdigest()[:12])
+    user_js_path = os.path.join(template_dir, 'user.js')
+    if not os.path.exists(user_js_path):
+        os.makedirs(template_dir, exist_ok=True)
+        with open(f'{user_js_path}.tmp', 'w') as f:
+            for name, value in sorted(prefs.items()):
+                f.write(f'user_pref({json.dumps(name)}, {json.dumps(value)});\n')
+        os.replace(f'{user_js_path}.tmp', user_js_path)
+    return template_dir
+
+
+def launch_firefox(headless_mode, user_agent, profile_parent):
+    """
+    Launches firefox on a copy of the template profile for user_agent
+    :param headless_mode: Boolean
+    :param user_agent: String
+    :param profile_parent: String temp dir for the profile copy, removed on quit
+    :return: webdriver obj
+    """
+    # firefox uses a profile passed as an argument in place, it is never zipped and shipped to geckodriver
+    profile_dir = os.path.join(profile_parent, 'profile')
+    shutil.copytree(profile_template(firefox_prefs(user_agent)), profile_dir)
+    options = Options()
+    options.headless = headless_mode
+    options.add_argument('-profile')
+    options.add_argument(profile_dir)
+    return webdriver.Firefox(options=options)
 
 
-def click_by_class(selector):
+def launch_chromium(headless_mode, user_agent, profile_parent):
     """
-    Clicks on node object selected by class name
-    :param selector: class attribute
-    :return: None
+    Launches chromium with the same user agent, notification and geo settings, lean and low memory modes as firefox
+    :param headless_mode: Boolean
+    :param user_agent: String
+    :param profile_parent: String temp dir for the user data dir, removed on quit
+    :return: webdriver obj
+    """
+    options = webdriver.ChromeOptions()
+    options.headless = headless_mode
+    options.add_argument(f'--user-agent={user_agent}')
+    # a user data dir per launch so accounts never share cookies
+    options.add_argument(f'--user-data-dir={os.path.join(profile_parent, "profile")}')
+    prefs = dict(CHROMIUM_PREFS)
+    if LEAN_MODE:
+        prefs.update(CHROMIUM_LEAN_PREFS)
+        for argument in CHROMIUM_LEAN_ARGS:
+            options.add_argument(argument)
+        options.add_argument('--host-resolver-rules=' + ', '.join(f'MAP {host} ~NOTFOUND' for host in LEAN_BLOCKED_HOSTS))
+    if LOW_MEMORY_MODE:
+        for argument in CHROMIUM_LOW_MEMORY_ARGS:
+            options.add_argument(argument)
+    options.add_experimental_option('prefs', prefs)
+    return webdriver.Chrome(options=options)
+
+
+def launch_browser(headless_mode, user_agent):
     """
+    Launches the BROWSER_BACKEND browser, logs launch latency
+    :param headless_mode: Boolean
+    :param user_agent: String
+    :return: webdriver obj
+    """
+    started = time.time()
+    profile_parent = tempfile.mkdtemp(prefix='ms_rewards_profile_')
     try:
-        browser.find_element_by_class_name(selector).click()
-    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
-        logging.exception(msg=f'Send key by class to {selector} element not visible or clickable.')
+        browser_obj = BROWSER_BACKENDS[BROWSER_BACKEND](headless_mode, user_agent, profile_parent)
     except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for send key by class to {selector} object')
+        shutil.rmtree(profile_parent, ignore_errors=True)
+        raise
+    browser_obj.profile_copy = profile_parent
+    count_round_trips(browser_obj)
+    logging.info(msg=f'{BROWSER_BACKEND} launch took {time.time() - started:.1f}s')
+    record_span('browser_launch', started, backend=BROWSER_BACKEND)
+    return browser_obj
 
 
-def click_by_id(obj_id):
+BROWSER_BACKENDS = {
+    'firefox': launch_firefox,
+    'chromium': launch_chromium,
+}
+
+
+def count_round_trips(browser_obj):
     """
-    Clicks on object located by ID
-    :param obj_id: id tag of html object
+    Wraps the browser's execute, which every driver and element command goes through, to count commands per phase
+    :param browser_obj: webdriver obj
     :return: None
     """
-    try:
-        browser.find_element_by_id(obj_id).click()
-    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
-        logging.exception(msg=f'Click by ID to {obj_id} element not visible or clickable.')
-    except WebDriverException:
-        logging.exception(msg=f'Webdriver Error for click by ID to {obj_id} object')
+    execute = browser_obj.execute
 
+    def counted_execute(driver_command, params=None):
+        ROUND_TRIPS[(current_account, current_phase)] += 1
+        return execute(driver_command, params)
+    browser_obj.execute = counted_execute
 
-def clear_by_id(obj_id):
+
+def quit_browser(browser_obj):
     """
-    Clear object found by id
-    :param obj_id: ID attribute of html object
+    Quits a browser and removes its profile copy
+    :param browser_obj: webdriver obj
     :return: None
     """
     try:
-        browser.find_element_by_id(obj_id).clear()
-    except (ElementNotVisibleException, ElementNotInteractableException):
-        logging.exception(msg=f'Clear by ID to {obj_id} element not visible or clickable.')
-    except NoSuchElementException:
-        logging.exception(msg=f'Send key by ID to {obj_id} element, no such element')
-        screenshot(obj_id)
-        browser.refresh()
-    except WebDriverException:
-        logging.exception(msg='Error.')
+        browser_obj.quit()
+    finally:
+        shutil.rmtree(getattr(browser_obj, 'profile_copy', ''), ignore_errors=True)
 
 
-def main_window():
+def prewarm_browser(headless_mode, user_agent):
     """
-    Closes current window and switches focus back to main window
+    Launches a browser on a background thread for the next browser_setup with the same settings
+    :param headless_mode: Boolean
+    :param user_agent: String
     :return: None
     """
-    try:
-        for i in range(1, len(browser.window_handles)):
-            browser.switch_to.window(browser.window_handles[i])
-            browser.close()
-    except WebDriverException:
-        logging.error('Error when switching to main_window')
-    finally:
-        browser.switch_to.window(browser.window_handles[0])
+    key = (headless_mode, user_agent)
+    if key not in warm_browsers:
+        executor = ThreadPoolExecutor(max_workers=1)
+        warm_browsers[key] = executor.submit(launch_browser, headless_mode, user_agent)
+        executor.shutdown(wait=False)
 
 
-def screenshot(selector):
+def quit_warm_browsers():
     """
-    Snaps screenshot of webpage when error occurs
-    :param selector: The name, ID, class, or other attribute of missing node object
+    Quits browsers that were launched ahead of time but never used
     :return: None
     """
-    logging.exception(msg=f'{selector} cannot be located.')
-    screenshot_file_name = f'{datetime.now().strftime("%Y%m%d%%H%M%S")}_{selector}.png'
-    screenshot_file_path = os.path.join('logs', screenshot_file_name)
-    browser.save_screenshot(screenshot_file_path)
+    while warm_browsers:
+        _, future = warm_browsers.popitem()
+        try:
+            quit_browser(future.result())
+        except (WebDriverException, OSError):
+            logging.exception(msg='Error quitting warm browser.')
 
 
-def latest_window():
+class BrowserRecycled(Exception):
     """
-    Switches to newest open window
-    :return:
+    Raised at a memory checkpoint once the watchdog finds the browser over MAX_RSS
     """
-    browser.switch_to.window(browser.window_handles[-1])
 
 
-def search(search_terms, mobile_search=False):
+def process_tree_rss(root_pid):
     """
-    Searches using an enumerated list of search terms, prints search item and number
-    :param search_terms: enumerated list of tuples with search terms
-    :param mobile_search: Boolean, True for mobile search limits, default false for pc search limits
-    :return: None
+    Sums resident memory of a process and all its descendants from /proc, linux only
+    :param root_pid: Int
+    :return: Int bytes
     """
-    if mobile_search:
-        search_limit = 20
-    else:
-        search_limit = 30
+    children = defaultdict(list)
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the command name may contain spaces, ppid is the second field after it
+        children[int(stat[stat.rindex(')') + 2:].split()[1])].append(int(entry))
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pids = [root_pid]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f'/proc/{pid}/statm', 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+        except OSError:
+            pass
+        pids.extend(children[pid])
+    return total
 
-    logging.info(msg="Search Start")
-    if search_terms == [] or search_terms is None:
-        logging.info(msg="Search Aborted. No Search Terms.")
-    else:
-        browser.get(BING_SEARCH_URL)
-        # ensure signed in not in mobile mode (pc mode doesn't register when searching)
-        if not mobile_search:
-            ensure_pc_mode_logged_in()
 
-        for num, item in search_terms:
-            try:
-                # clears search bar and enters in next search term
-                time.sleep(1)
-                wait_until_visible(By.ID, 'sb_form_q', 30)
-                clear_by_id('sb_form_q')
-                send_key_by_id('sb_form_q', item)
-                time.sleep(0.1)
-                send_key_by_id('sb_form_q', Keys.RETURN)
-                # prints search term and item, limited to 80 chars
-                logging.debug(msg=f'Search #{num}: {item[:80]}')
-                time.sleep(random.randint(3, 4))  # random sleep for more human-like, and let ms reward website keep up.
-
-                # check to see if search is complete, if yes, break out of loop
-                if num % search_limit == 0:
-                    if mobile_search:
-                        # in mobile mode, get point total does not work if no search is done, URL = 404
-                        if get_point_total(mobile=True):
-                            logging.info(msg=f'Stopped at search number {num}')
-                            return
-                        # if point total not met, return to search page
-                        browser.get(BING_SEARCH_URL)
-                    else:
-                        if get_point_total(pc=True):
-                            logging.info(msg=f'Stopped at search number {num}')
-                            return
-                        browser.get(BING_SEARCH_URL)
-            except UnexpectedAlertPresentException:
-                # this captures alerts such as bing asking for location information for certain search terms
-                logging.info(msg='Unexpected alert during search, returning to search URL')
-                browser.get(BING_SEARCH_URL)
+def browser_rss():
+    """
+    Gets resident memory of the running browser's geckodriver and firefox processes
+    :return: Int bytes, 0 if no browser is running
+    """
+    try:
+        return process_tree_rss(browser.service.process.pid)
+    except (AttributeError, NameError):
+        return 0
 
 
-def iter_dailies():
+def rss_watchdog():
     """
-    Iterates through all outstanding dailies
+    Samples the browser's memory until watchdog_stop is set, asks for a recycle when it is over MAX_RSS
     :return: None
     """
-    browser.get(DASHBOARD_URL)
-    time.sleep(4)
-    # TODO there is an error here where the object cannot be converted to data, only happens on digital ocean
-    #   may be related to a wait after a sleep.
-    #   stack overflow states that it is likely related to ram, need 2gb over 1gb.
-    open_offers = browser.find_elements_by_xpath('//span[contains(@class, "mee-icon-AddMedium")]')
-    if open_offers:
-        logging.info(msg=f'Number of incomplete offers: {len(open_offers)}')
-        # get common parent element of open_offers
-        parent_elements = [open_offer.find_element_by_xpath('..//..//..//..') for open_offer in open_offers]
-        # get points links from parent, # finds ng-transclude descendant of selected node
-        offer_links = [parent.find_element_by_xpath('descendant::ng-transclude') for parent in parent_elements]
-        # iterate through the dailies
-        for offer in offer_links:
-            time.sleep(3)
-            logging.debug(msg='Detected offer.')
-            # click and switch focus to latest window
-            offer.click()
-            latest_window()
-            time.sleep(5)
-            # check for sign-in prompt
-            sign_in_prompt()
-            # check for poll by ID
-
-            if find_by_id('btoption0'):
-                logging.debug(msg='Poll identified.')
-                daily_poll()
-            # check for quiz by checking for ID
-            elif find_by_id('rqStartQuiz'):
-                click_by_id('rqStartQuiz')
-                # test for drag or drop or regular quiz
-                if find_by_id('rqAnswerOptionNum0'):
-                    logging.debug(msg='Drag and Drop Quiz identified.')
-                    drag_and_drop_quiz()
-                # look for lightning quiz indicator
-                elif find_by_id('rqAnswerOption0'):
-                    logging.debug(msg='Lightning Quiz identified.')
-                    lightning_quiz()
-            elif find_by_class('wk_Circle'):
-                logging.debug(msg='Click Quiz identified.')
-                click_quiz()
-            # else do scroll for exploring pages
-            else:
-                logging.debug(msg='Explore Daily identified.')
-                explore_daily()
-        # check at the end of the loop to log if any offers are remaining
-        browser.get(DASHBOARD_URL)
-        time.sleep(0.1)
-        wait_until_visible(By.TAG_NAME, 'body', 10)
-        open_offers = browser.find_elements_by_xpath('//span[contains(@class, "mee-icon-AddMedium")]')
-        logging.info(msg=f'Number of incomplete offers remaining: {len(open_offers)}')
-    else:
-        logging.info(msg='No dailies found.')
+    peak = 0
+    while not watchdog_stop.wait(RSS_SAMPLE_SECONDS):
+        rss = browser_rss()
+        peak = max(peak, rss)
+        if rss > MAX_RSS and not recycle_requested.is_set():
+            logging.warning(msg=f'Browser using {rss // 2 ** 20} MB, over {MAX_RSS // 2 ** 20} MB, recycling.')
+            recycle_requested.set()
+    logging.info(msg=f'Peak browser memory {peak // 2 ** 20} MB')
 
 
-def explore_daily():
-    # needs try/except bc these functions don't have exception handling built in.
-    try:
-        # select html to send commands to
-        html = browser.find_element_by_tag_name('html')
-        # scroll up and down to trigger points
-        for i in range(3):
-            html.send_keys(Keys.END)
-            html.send_keys(Keys.HOME)
-        # exit to main window
-        main_window()
-    except TimeoutException:
-        logging.exception(msg='Explore Daily Timeout Exception.')
-    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
-        logging.exception(msg='Element not clickable or visible.')
-    except WebDriverException:
-        logging.exception(msg='Error.')
+def start_rss_watchdog():
+    """
+    Starts the memory watchdog thread if MAX_RSS is set and /proc is available
+    :return: None
+    """
+    if not MAX_RSS:
+        return
+    if not os.path.isdir('/proc'):
+        logging.warning(msg='No /proc on this system, memory watchdog disabled.')
+        return
+    threading.Thread(target=rss_watchdog, name='rss_watchdog', daemon=True).start()
 
 
-def daily_poll():
+def memory_checkpoint():
     """
-    Randomly clicks a poll answer, returns to main window
+    Safe point between searches and offers, hands control back to run_recyclable if a recycle was asked for
     :return: None
     """
-    time.sleep(3)
-    # click poll option
-    choices = ['btoption0', 'btoption1']  # new poll format
-    click_by_id(random.choice(choices))
-    time.sleep(3)
-    # close window, switch to main
-    main_window()
+    if recycle_requested.is_set():
+        recycle_requested.clear()
+        if recycles_left > 0:
+            raise BrowserRecycled
+        logging.warning(msg='Out of recycles for this phase, carrying on.')
 
 
-def lightning_quiz():
-    for question_round in range(10):
-        logging.debug(msg=f'Round# {question_round}')
-        # iterate through 4 choices
-        for i in range(4):
-            click_choices = find_by_class('rqOption')
-            if click_choices:
-                i = click_choices[i]
-                # if object is stale, greyed out, or not visible, skip it
-                if i.is_displayed():
-                    logging.debug(msg=f'Clicked {i}')
-                    i.click()
-                    time.sleep(2)
-        # let new page load
-        time.sleep(3)
-        if find_by_id('quizCompleteContainer'):
-            break
-    # close the quiz completion splash
-    find_by_css('.cico.btCloseBack')[0].click()
-    time.sleep(3)
-    main_window()
+def browser_setup(headless_mode, user_agent, prelaunched=True):
+    """
+    Inits the browser with headless setting and user agent, takes a prelaunched one if available
+    :param headless_mode: Boolean
+    :param user_agent: String
+    :param prelaunched: Boolean, False to always launch a new one and leave prelaunched ones for the next account
+    :return: webdriver obj
+    """
+    future = warm_browsers.pop((headless_mode, user_agent), None) if prelaunched else None
+    if future is not None:
+        try:
+            firefox_browser_obj = future.result()
+            logging.info(msg='Using prelaunched browser.')
+            return firefox_browser_obj
+        except WebDriverException:
+            logging.exception(msg='Prelaunched browser failed, launching a new one.')
+    return launch_browser(headless_mode, user_agent)
 
 
-def click_quiz():
-    # start the quiz, iterates 10 times
-    for i in range(10):
-        if find_by_css('.cico.btCloseBack'):
-            find_by_css('.cico.btCloseBack')[0].click()[0].click()
-            logging.debug(msg='Quiz popped up during a click quiz...')
-        choices = find_by_class('wk_Circle')
+def log_in(email_address, pass_word):
+    logging.info(msg=f'Logging in {email_address}...')
+    browser.get(LOGIN_URL)
+    # wait for login form and enter email
+    wait_until_clickable(By.NAME, 'loginfmt', 10)
+    send_key_by_name('loginfmt', email_address)
+    send_key_by_name('loginfmt', Keys.RETURN)
+    logging.debug(msg='Sent Email Address.')
+    # wait for password form and enter password
+    wait_until_clickable(By.NAME, 'passwd', 10)
+    send_key_by_name('passwd', pass_word)
+    logging.debug(msg='Sent Password.')
+    # the email step swaps in the password field in place, the password step always redirects
+    login_url = browser.current_url
+    send_key_by_name('passwd', Keys.RETURN)
+    wait_until_url_changes(login_url, 15, site='log_in redirect')
+    # wait for account page to finish loading
+    wait_until_visible(By.ID, 'uhfLogo', 10)
+    wait_until_page_ready(10, site='log_in')
+
+
+def cookie_path(email_address):
+    """
+    Gets the cookie jar path for an account
+    :param email_address: String account name
+    :return: String path to json cookie jar
+    """
+    return os.path.join(COOKIE_DIR, re.sub(r'[^\w.@-]', '_', email_address) + '.json')
+
+
+def save_cookies(email_address):
+    """
+    Merges the cookies visible on the current page into the account's cookie jar.
+    Webdriver only exposes cookies of the current domain, so call on each domain worth keeping.
+    :param email_address: String account name
+    :return: None
+    """
+    url = urlsplit(browser.current_url)
+    if url.scheme not in ('http', 'https'):
+        return
+    path = cookie_path(email_address)
+    try:
+        with open(path, 'r') as f:
+            jar = json.load(f)
+    except (OSError, ValueError):
+        jar = {}
+    jar[f'{url.scheme}://{url.netloc}'] = browser.get_cookies()
+    os.makedirs(COOKIE_DIR, exist_ok=True)
+    # cookies are as good as a password, keep them private to the user
+    tmp_path = f'{path}.tmp'
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        json.dump(jar, f)
+    os.replace(tmp_path, path)
+
+
+def restore_cookies(email_address):
+    """
+    Loads unexpired cookies from the account's cookie jar into the browser
+    :param email_address: String account name
+    :return: Boolean, True if any cookies were restored
+    """
+    try:
+        with open(cookie_path(email_address), 'r') as f:
+            jar = json.load(f)
+    except (OSError, ValueError):
+        return False
+    restored = False
+    for origin, cookies in jar.items():
+        cookies = [cookie for cookie in cookies if cookie.get('expiry', float('inf')) > time.time()]
+        if not cookies:
+            continue
+        # add_cookie only works on the cookie's own domain, robots.txt is the cheapest page to land on
+        browser.get(f'{origin}/robots.txt')
+        for cookie in cookies:
+            try:
+                browser.add_cookie({key: cookie[key] for key in COOKIE_KEYS if key in cookie})
+                restored = True
+            except WebDriverException:
+                logging.debug(msg=f'Could not restore cookie {cookie.get("name")} for {origin}')
+    return restored
+
+
+def session_valid():
+    """
+    Checks if the browser is signed in by loading the dashboard, which redirects to login if not
+    :return: Boolean, True if signed in
+    """
+    browser.get(DASHBOARD_URL)
+    wait_for(lambda driver: driver.find_elements_by_xpath(DASHBOARD_ICON_XPATH) or
+             driver.find_elements_by_name('loginfmt'), 15, site='session check')
+    return bool(find_by_xpath(DASHBOARD_ICON_XPATH))
+
+
+def switch_user_agent(user_agent):
+    """
+    Overrides the user agent of the running browser through firefox's chrome context, chromium always relaunches
+    :param user_agent: String
+    :return: Boolean, True if switched without a relaunch
+    """
+    try:
+        with browser.context(browser.CONTEXT_CHROME):
+            browser.execute_script('Services.prefs.setCharPref("general.useragent.override", arguments[0]);',
+                                   user_agent)
+        return True
+    except (WebDriverException, AttributeError):
+        logging.info(msg='Could not switch user agent in place, relaunching browser.')
+        return False
+
+
+def start_session(email_address, pass_word, headless_mode, user_agent, prelaunched=True):
+    """
+    Gets a signed in browser with user_agent. Switches the running browser's user agent when possible,
+    otherwise launches a new one, restores the account's saved cookies and only logs in if they are stale.
+    :param email_address: String account name
+    :param pass_word: String password
+    :param headless_mode: Boolean
+    :param user_agent: String
+    :param prelaunched: Boolean, False to not take a prelaunched browser, see browser_setup
+    :return: None
+    """
+    global browser, session_args
+    session_args = (email_address, pass_word, headless_mode, user_agent)
+    if browser is not None:
+        if switch_user_agent(user_agent):
+            # still signed in from the previous phase
+            return
+        quit_browser(browser)
+    warm = prelaunched and (headless_mode, user_agent) in warm_browsers
+    with span('browser_setup', warm=str(warm)):
+        browser = browser_setup(headless_mode, user_agent, prelaunched)
+    if restore_cookies(email_address) and session_valid():
+        logging.info(msg=f'Reusing saved session for {email_address}.')
+    else:
+        with span('log_in'):
+            log_in(email_address, pass_word)
+        save_cookies(email_address)
+        # the sso cookies that spare the next run a password login live on the login origin,
+        # webdriver only shows them from a page there
+        login_url = urlsplit(LOGIN_URL)
+        browser.get(f'{login_url.scheme}://{login_url.netloc}/robots.txt')
+    save_cookies(email_address)
+
+
+def recycle_browser():
+    """
+    Checkpoints the account's cookies, quits the browser and starts a new signed in one like the last
+    :return: None
+    """
+    global browser
+    email_address = session_args[0]
+    with span('browser_recycle'):
+        save_cookies(email_address)
+        quit_browser(browser)
+        browser = None
+        # a prelaunched browser is kept for the next account
+        start_session(*session_args, prelaunched=False)
+    logging.info(msg=f'Browser recycled for {email_address}.')
+
+
+def run_recyclable(phase_func, *args, **kwargs):
+    """
+    Runs a phase, recycling the browser and running the phase again whenever it stops at a memory checkpoint.
+    Phases skip work already done, searches plan from the point status and dailies from the journal.
+    :param phase_func: function of the phase
+    :return: phase_func result
+    """
+    global recycles_left
+    recycles_left = MAX_RECYCLES
+    while True:
+        try:
+            return phase_func(*args, **kwargs)
+        except BrowserRecycled:
+            recycles_left -= 1
+            recycle_browser()
+
+
+def find_by_id(obj_id):
+    """
+    Searches for elements matching ID
+    :param obj_id:
+    :return: List of all nodes matching provided ID
+    """
+    return browser.find_elements_by_id(obj_id)
+
+
+def find_by_xpath(selector):
+    """
+    Finds elements by xpath
+    :param selector: xpath string
+    :return: returns a list of all matching selenium objects
+    """
+    return browser.find_elements_by_xpath(selector)
+
+
+def find_by_class(selector):
+    """
+    Finds elements by class name
+    :param selector: Class selector of html obj
+    :return: returns a list of all matching selenium objects
+    """
+    return browser.find_elements_by_class_name(selector)
+
+
+def find_by_css(selector):
+    """
+    Finds nodes by css selector
+    :param selector: CSS selector of html node obj
+    :return: returns a list of all matching selenium objects
+    """
+    return browser.find_elements_by_css_selector(selector)
+
+
+class CachedElement:
+    """
+    An element located on first use and reused for following actions,
+    located again only when it went stale, is not there yet or the browser was relaunched
+    """
+    def __init__(self, by_, selector):
+        self.by_ = by_
+        self.selector = selector
+        self.driver = None
+        self.element = None
+
+    def resolve(self):
+        if self.element is None or self.driver is not browser:
+            self.element = browser.find_element(self.by_, self.selector)
+            self.driver = browser
+        return self.element
+
+    def forget(self):
+        self.element = None
+
+    def call(self, method, *args, time_to_wait=10):
+        """
+        Calls a WebElement method on the cached element
+        :param method: String WebElement method name
+        :param args: method arguments
+        :param time_to_wait: Int seconds to wait for the element to be clickable if it is not ready
+        :return: method result
+        """
+        try:
+            try:
+                return getattr(self.resolve(), method)(*args)
+            except StaleElementReferenceException:
+                # the page changed under the cached element, locate it again
+                self.element = None
+                return getattr(self.resolve(), method)(*args)
+        except (NoSuchElementException, ElementNotVisibleException, ElementNotInteractableException,
+                ElementClickInterceptedException):
+            # acting first saves the wait's round trips when the element is ready, which it usually is
+            self.element = None
+            if not wait_until_clickable(self.by_, self.selector, time_to_wait, site=self.selector):
+                raise
+            return getattr(self.resolve(), method)(*args)
+
+    def click(self, time_to_wait=10):
+        return self.call('click', time_to_wait=time_to_wait)
+
+    def clear(self, time_to_wait=10):
+        return self.call('clear', time_to_wait=time_to_wait)
+
+    def send_keys(self, *keys, time_to_wait=10):
+        return self.call('send_keys', *keys, time_to_wait=time_to_wait)
+
+
+class Page:
+    """
+    Named elements of one page, each a CachedElement
+    """
+    def __init__(self, **locators):
+        self.elements = {name: CachedElement(by_, selector) for name, (by_, selector) in locators.items()}
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['elements'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def forget(self):
+        """
+        Drops every cached element, for when the page is known to be navigating away
+        :return: None
+        """
+        for element in self.elements.values():
+            element.forget()
+
+
+SEARCH_PAGE = Page(search_box=(By.ID, 'sb_form_q'))
+CLICK_QUIZ_PAGE = Page(check=(By.ID, 'check'))
+
+
+def record_span(name, started, **tags):
+    """
+    Records a finished timing span for the current account
+    :param name: String span name
+    :param started: Float time.time() when the span started
+    :param tags: String tags such as phase or offer type
+    :return: None
+    """
+    SPANS.append({'name': name, 'account': current_account, 'start': started,
+                  'seconds': time.time() - started, 'tags': tags})
+
+
+@contextmanager
+def span(name, **tags):
+    """
+    Times the enclosed block as a span, more tags can be added to the yielded dict inside the block
+    :param name: String span name
+    :param tags: String tags such as phase or offer type
+    :return: dict of tags
+    """
+    global current_phase
+    started = time.time()
+    outer_phase = current_phase
+    # search terms are fetched as a phase on a background thread, it must not relabel the main thread's work
+    sets_phase = name == 'phase' and threading.current_thread() is threading.main_thread()
+    if sets_phase:
+        current_phase = tags['phase']
+    try:
+        if PROFILE_DIR is not None and name in PROFILED_SPANS:
+            with profiled(tags.get('phase', name)):
+                yield tags
+        else:
+            yield tags
+    finally:
+        if sets_phase:
+            current_phase = outer_phase
+        record_span(name, started, **tags)
+
+
+@contextmanager
+def profiled(label):
+    """
+    Runs the enclosed block under cProfile and between two tracemalloc snapshots, see write_profile
+    :param label: String phase name
+    :return: None
+    """
+    if getattr(profiling, 'active', False):
+        yield
+        return
+    snapshot = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # python 3.12+ allows one active profiler across all threads, e.g. the term fetch overlapping log in
+        profiler = None
+    if profiler is None:
+        logging.info(msg=f'Another phase is being profiled, {label} runs unprofiled.')
+        yield
+        return
+    profiling.active = True
+    started = time.time()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiling.active = False
+        write_profile(label, profiler, snapshot, time.time() - started)
+
+
+def write_profile(label, profiler, snapshot, seconds):
+    """
+    Writes a pstats file and the top allocation sites since snapshot for a phase of the current account
+    :param label: String phase name
+    :param profiler: cProfile.Profile of the phase
+    :param snapshot: tracemalloc.Snapshot from the start of the phase
+    :param seconds: Float wall time of the phase
+    :return: None
+    """
+    account = current_account or 'run'
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base_path = os.path.join(PROFILE_DIR, re.sub(r'[^\w.@-]', '_', f'{account}_{label}'))
+    profiler.dump_stats(f'{base_path}.pstats')
+    stats = pstats.Stats(profiler)
+    # stats entries are function -> (calls, primitive calls, own time, cumulative time, callers)
+    top_function = max(stats.stats.items(), key=lambda item: item[1][2])[0] if stats.stats else None
+    own_frames = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    diffs = tracemalloc.take_snapshot().filter_traces(own_frames).compare_to(snapshot.filter_traces(own_frames),
+                                                                            'lineno')
+    with open(f'{base_path}.alloc.txt', 'w') as f:
+        for diff in diffs[:PROFILE_TOP]:
+            f.write(f'{diff}\n')
+    PROFILE_RESULTS.append({
+        'account': account,
+        'phase': label,
+        'seconds': seconds,
+        'calls': stats.total_calls,
+        'alloc_kb': sum(diff.size_diff for diff in diffs) / 1024,
+        'top': pstats.func_std_string(top_function) if top_function else '',
+    })
+
+
+def start_profiling(run_started):
+    """
+    Points the profiles of a run at their own dir
+    :param run_started: datetime of the start of the run
+    :return: None
+    """
+    global PROFILE_DIR
+    PROFILE_DIR = os.path.join(PROFILE_ROOT, run_started.strftime('%Y%m%d_%H%M%S'))
+
+
+def log_profile_summary():
+    """
+    Prints and logs a table of the run's profiled phases, then clears them
+    :return: None
+    """
+    lines = [f'Profiles in {PROFILE_DIR}',
+             f'{"account":<32}{"phase":<16}{"seconds":>9}{"calls":>11}{"alloc KB":>10}  most own time']
+    for result in PROFILE_RESULTS:
+        lines.append(f'{result["account"][:31]:<32}{result["phase"]:<16}{result["seconds"]:>9.1f}'
+                     f'{result["calls"]:>11}{result["alloc_kb"]:>10.0f}  {result["top"]}')
+    summary = '\n'.join(lines)
+    print(summary)
+    logging.info(msg=f'Profile summary:\n{summary}')
+    PROFILE_RESULTS.clear()
+
+
+def prometheus_labels(labels):
+    """
+    Formats a dict as prometheus text format labels
+    :param labels: dict of label name to value
+    :return: String of labels in braces
+    """
+    escaped = {key: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for key, value in labels.items() if value is not None}
+    return '{' + ','.join(f'{key}="{value}"' for key, value in sorted(escaped.items())) + '}'
+
+
+def write_metrics(run_started):
+    """
+    Writes this run's timing spans and search metrics to a json file per run,
+    and their totals to a prometheus text format file that is replaced every run
+    :param run_started: datetime of the start of the run
+    :return: None
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    run_id = run_started.strftime('%Y%m%d_%H%M%S')
+    with open(os.path.join(METRICS_DIR, f'run_{run_id}.json'), 'w') as f:
+        round_trips = [{'account': account, 'phase': phase, 'count': count}
+                       for (account, phase), count in ROUND_TRIPS.items()]
+        recoveries = [{'account': account, 'site': site, 'step': step, 'count': count}
+                      for (account, site, step), count in RECOVERY_COUNTS.items()]
+        json.dump({'run': run_id, 'spans': SPANS, 'searches': SEARCH_METRICS, 'round_trips': round_trips,
+                   'recoveries': recoveries}, f, indent=2)
+
+    # sum spans by name, account and tags
+    totals = defaultdict(lambda: [0, 0.0])
+    for finished in SPANS:
+        labels = dict(finished['tags'], span=finished['name'], account=finished['account'])
+        total = totals[prometheus_labels(labels)]
+        total[0] += 1
+        total[1] += finished['seconds']
+    lines = ['# HELP ms_rewards_span_seconds Time spent in each span during the last run.',
+             '# TYPE ms_rewards_span_seconds summary']
+    for labels, (count, seconds) in sorted(totals.items()):
+        lines.append(f'ms_rewards_span_seconds_sum{labels} {seconds:.3f}')
+        lines.append(f'ms_rewards_span_seconds_count{labels} {count}')
+    lines.append('# HELP ms_rewards_searches_issued Searches issued per search phase during the last run.')
+    lines.append('# TYPE ms_rewards_searches_issued gauge')
+    for metric in SEARCH_METRICS:
+        labels = prometheus_labels({'phase': metric['phase'], 'account': metric['account']})
+        lines.append(f'ms_rewards_searches_issued{labels} {metric["issued"]}')
+    lines.append('# HELP ms_rewards_search_points_gained Search points gained per search phase during the last run.')
+    lines.append('# TYPE ms_rewards_search_points_gained gauge')
+    for metric in SEARCH_METRICS:
+        labels = prometheus_labels({'phase': metric['phase'], 'account': metric['account']})
+        lines.append(f'ms_rewards_search_points_gained{labels} {metric["gained"]}')
+    lines.append('# HELP ms_rewards_webdriver_round_trips Webdriver commands sent per phase during the last run.')
+    lines.append('# TYPE ms_rewards_webdriver_round_trips gauge')
+    for (account, phase), count in sorted(ROUND_TRIPS.items(), key=str):
+        labels = prometheus_labels({'phase': phase, 'account': account})
+        lines.append(f'ms_rewards_webdriver_round_trips{labels} {count}')
+    lines.append('# HELP ms_rewards_recoveries Recovery steps and failed call sites during the last run.')
+    lines.append('# TYPE ms_rewards_recoveries gauge')
+    for (account, site, step), count in sorted(RECOVERY_COUNTS.items(), key=str):
+        labels = prometheus_labels({'site': site, 'step': step, 'account': account})
+        lines.append(f'ms_rewards_recoveries{labels} {count}')
+    lines.append('# HELP ms_rewards_last_run_timestamp_seconds Start time of the last run.')
+    lines.append('# TYPE ms_rewards_last_run_timestamp_seconds gauge')
+    lines.append(f'ms_rewards_last_run_timestamp_seconds {run_started.timestamp():.0f}')
+    # swap in whole file so a collector never reads it half written
+    prom_path = os.path.join(METRICS_DIR, 'ms_rewards.prom')
+    with open(f'{prom_path}.tmp', 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(f'{prom_path}.tmp', prom_path)
+
+
+def record_wait(site, started):
+    """
+    Adds time spent waiting to the per call site totals
+    :param site: String name of the call site
+    :param started: Float time.time() when the wait started
+    :return: None
+    """
+    stats = WAIT_STATS[site]
+    stats[0] += 1
+    stats[1] += time.time() - started
+
+
+def log_wait_stats():
+    """
+    Logs time spent waiting per call site, slowest first, and resets the totals
+    :return: None
+    """
+    for site, (calls, seconds) in sorted(WAIT_STATS.items(), key=lambda x: x[1][1], reverse=True):
+        logging.info(msg=f'Waited {seconds:.1f}s over {calls} calls at {site}')
+    WAIT_STATS.clear()
+
+
+def pace(site='pace'):
+    """
+    Sleeps for the minimum pacing floor, jittered so actions are not evenly spaced
+    :param site: String name of the call site
+    :return: None
+    """
+    started = time.time()
+    time.sleep(random.uniform(MIN_PACE, MIN_PACE * 1.5))
+    record_wait(site, started)
+
+
+class PhaseAborted(Exception):
+    """
+    Raised when a call site's policy says abort or the phase used up its error budget
+    """
+
+
+def recovery_step(step, site, policy, attempt):
+    """
+    Runs one recovery step before the next attempt and counts it
+    :param step: String retry, dismiss_alert or navigate
+    :param site: String name of the call site
+    :param policy: RecoveryPolicy of the call site
+    :param attempt: Int number of attempts so far, for the backoff
+    :return: None
+    """
+    RECOVERY_COUNTS[(current_account, site, step)] += 1
+    logging.info(msg=f'Recovering {site}: {step}')
+    if step == 'dismiss_alert':
+        try:
+            browser.switch_to.alert.dismiss()
+        except WebDriverException:
+            logging.debug(msg=f'No alert to dismiss at {site}')
+    elif step == 'navigate':
+        browser.get(globals()[policy.url])
+    elif step == 'retry':
+        time.sleep(min(RECOVERY_BACKOFF_CAP, RECOVERY_BACKOFF * 2 ** attempt))
+
+
+def spend_error_budget(site):
+    """
+    Counts a call site that failed after recovery against the current phase
+    :param site: String name of the call site
+    :return: None
+    """
+    RECOVERY_COUNTS[(current_account, site, 'failed')] += 1
+    key = (current_account, current_phase)
+    phase_errors[key] += 1
+    if current_phase is not None and phase_errors[key] > PHASE_ERROR_BUDGET:
+        raise PhaseAborted(f'{current_phase} failed at more than {PHASE_ERROR_BUDGET} call sites, last {site}')
+
+
+def recover(site, selector, attempt, time_to_wait=10):
+    """
+    Tries an action, applying the call site's recovery policy between attempts
+    :param site: String name of the call site, key of RECOVERY_POLICIES
+    :param selector: String selector the action is on, for the screenshot
+    :param attempt: Callable taking the seconds it may wait
+    :param time_to_wait: Int seconds for the first attempt
+    :return: Boolean, True if an attempt succeeded
+    """
+    policy = RECOVERY_POLICIES.get(site, DEFAULT_RECOVERY)
+    wait = time_to_wait
+    for tried, step in enumerate(policy.steps + (None,)):
+        try:
+            attempt(wait)
+            return True
+        except WebDriverException as e:
+            error = e
+        if step is None or step == 'abort':
+            break
+        recovery_step(step, site, policy, tried)
+        wait = min(time_to_wait, RECOVERY_RETRY_WAIT)
+    logging.warning(msg=f'{site} failed on {selector} after {tried} recovery steps.', exc_info=error)
+    screenshot(selector)
+    if step == 'abort':
+        RECOVERY_COUNTS[(current_account, site, 'abort')] += 1
+        raise PhaseAborted(f'{site} failed, policy aborts')
+    spend_error_budget(site)
+    return False
+
+
+def wait_for(condition, time_to_wait=10, site='wait'):
+    """
+    Waits until a condition is met, records time spent under the call site
+    :param condition: Callable taking the webdriver, e.g. from expected_conditions
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site
+    :return: Boolean, True if condition was met
+    """
+    started = time.time()
+    try:
+        WebDriverWait(browser, time_to_wait).until(condition)
+        return True
+    except TimeoutException:
+        logging.debug(msg=f'{site} condition not met after {time_to_wait}s')
+        return False
+    finally:
+        record_wait(site, started)
+
+
+def wait_until_present(by_, selector, time_to_wait=10, site=None):
+    """
+    Waits until an object matching selector is in the DOM, visible or not
+    :param by_: Select by ID, XPATH, CSS Selector, other, from By module
+    :param selector: string of selector
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site, defaults to selector
+    :return: Boolean, True if found
+    """
+    return wait_for(ec.presence_of_element_located((by_, selector)), time_to_wait, site or selector)
+
+
+def wait_until_url_changes(old_url, time_to_wait=10, site='url change'):
+    """
+    Waits until the browser navigates away from old_url
+    :param old_url: String URL before the navigation
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site
+    :return: Boolean, True if URL changed
+    """
+    return wait_for(ec.url_changes(old_url), time_to_wait, site)
+
+
+def wait_until_page_ready(time_to_wait=10, site='page ready'):
+    """
+    Waits until the current document has finished loading
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site
+    :return: Boolean, True if document is ready
+    """
+    return wait_for(lambda driver: driver.execute_script('return document.readyState') == 'complete',
+                    time_to_wait, site)
+
+
+def wait_until_visible(by_, selector, time_to_wait=10, site=None):
+    """
+    Wait until all objects matching selector are visible, recovers as the call site's policy says if not
+    :param by_: Select by ID, XPATH, CSS Selector, other, from By module
+    :param selector: string of selector
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site, defaults to selector
+    :return: Boolean, True if visible
+    """
+    started = time.time()
+    try:
+        return recover(site or selector, selector,
+                       lambda wait: WebDriverWait(browser, wait).until(ec.visibility_of_element_located((by_, selector))),
+                       time_to_wait)
+    finally:
+        record_wait(site or selector, started)
+
+
+def wait_until_clickable(by_, selector, time_to_wait=10, site=None):
+    """
+    Waits for element to be clickable, recovers as the call site's policy says if not
+    :param by_:  BY module args to pick a selector
+    :param selector: string of xpath, css_selector or other
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site, defaults to selector
+    :return: Boolean, True if clickable
+    """
+    started = time.time()
+    try:
+        return recover(site or selector, selector,
+                       lambda wait: WebDriverWait(browser, wait).until(ec.element_to_be_clickable((by_, selector))),
+                       time_to_wait)
+    finally:
+        record_wait(site or selector, started)
+
+
+def send_key_by_name(name, key):
+    """
+    Sends key to target found by name, recovers as the call site's policy says if it fails
+    :param name: Name attribute of html object
+    :param key: Key to be sent to that object
+    :return: None
+    """
+    recover(name, name, lambda wait: browser.find_element_by_name(name).send_keys(key))
+
+
+def send_key_by_id(obj_id, key):
+    """
+    Sends key to target found by id, recovers as the call site's policy says if it fails
+    :param obj_id: ID attribute of the html object
+    :param key: Key to be sent to that object
+    :return: None
+    """
+    recover(obj_id, obj_id, lambda wait: browser.find_element_by_id(obj_id).send_keys(key))
+
+
+def click_by_class(selector):
+    """
+    Clicks on node object selected by class name
+    :param selector: class attribute
+    :return: None
+    """
+    try:
+        browser.find_element_by_class_name(selector).click()
+    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
+        logging.exception(msg=f'Send key by class to {selector} element not visible or clickable.')
+    except WebDriverException:
+        logging.exception(msg=f'Webdriver Error for send key by class to {selector} object')
+
+
+def click_by_id(obj_id):
+    """
+    Clicks on object located by ID
+    :param obj_id: id tag of html object
+    :return: None
+    """
+    try:
+        browser.find_element_by_id(obj_id).click()
+    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
+        logging.exception(msg=f'Click by ID to {obj_id} element not visible or clickable.')
+    except WebDriverException:
+        logging.exception(msg=f'Webdriver Error for click by ID to {obj_id} object')
+
+
+def clear_by_id(obj_id):
+    """
+    Clear object found by id, recovers as the call site's policy says if it fails
+    :param obj_id: ID attribute of html object
+    :return: None
+    """
+    recover(obj_id, obj_id, lambda wait: browser.find_element_by_id(obj_id).clear())
+
+
+def main_window():
+    """
+    Closes current window and switches focus back to main window
+    :return: None
+    """
+    try:
+        for i in range(1, len(browser.window_handles)):
+            browser.switch_to.window(browser.window_handles[i])
+            browser.close()
+    except WebDriverException:
+        logging.error('Error when switching to main_window')
+    finally:
+        browser.switch_to.window(browser.window_handles[0])
+
+
+def write_screenshots():
+    """
+    Writes queued screenshots until a None is queued, evicting the oldest files past the budget
+    :return: None
+    """
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    # budget covers screenshots of earlier runs too, oldest first
+    paths = sorted((os.path.join(SCREENSHOT_DIR, name) for name in os.listdir(SCREENSHOT_DIR)
+                    if name.endswith('.png')), key=os.path.getmtime)
+    files = deque((path, os.path.getsize(path)) for path in paths)
+    total_bytes = sum(size for _, size in files)
+    while True:
+        item = screenshot_queue.get()
+        if item is None:
+            break
+        path, png = item
+        try:
+            with open(path, 'wb') as f:
+                f.write(png)
+            files.append((path, len(png)))
+            total_bytes += len(png)
+            while files and (len(files) > SCREENSHOT_MAX_COUNT or total_bytes > SCREENSHOT_MAX_BYTES):
+                old_path, old_size = files.popleft()
+                os.remove(old_path)
+                total_bytes -= old_size
+        except OSError:
+            logging.exception(msg=f'Error writing screenshot {path}')
+
+
+def stop_screenshot_writer():
+    """
+    Lets the screenshot writer finish the queue and waits for it
+    :return: None
+    """
+    if screenshot_writer is not None and screenshot_writer.is_alive():
+        screenshot_queue.put(None)
+        screenshot_writer.join(timeout=30)
+
+
+def screenshot(selector):
+    """
+    Snaps screenshot of webpage when error occurs, once per selector per run, callers log the error.
+    Only grabs the png, writing it to disk is left to a background thread.
+    :param selector: The name, ID, class, or other attribute of missing node object
+    :return: None
+    """
+    global screenshot_writer
+    if selector in screenshot_selectors:
+        return
+    screenshot_selectors.add(selector)
+    try:
+        png = browser.get_screenshot_as_png()
+    except WebDriverException:
+        logging.debug(msg=f'Could not capture screenshot for {selector}')
+        return
+    file_selector = re.sub(r'[^\w.-]', '_', selector)[:60]
+    screenshot_file_name = f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{file_selector}.png'
+    if screenshot_writer is None:
+        screenshot_writer = threading.Thread(target=write_screenshots, name='screenshot_writer', daemon=True)
+        screenshot_writer.start()
+    try:
+        screenshot_queue.put_nowait((os.path.join(SCREENSHOT_DIR, screenshot_file_name), png))
+    except queue.Full:
+        logging.debug(msg=f'Screenshot queue full, dropped screenshot for {selector}')
+
+
+def latest_window():
+    """
+    Switches to newest open window
+    :return:
+    """
+    browser.switch_to.window(browser.window_handles[-1])
+
+
+def searches_needed(status, mobile_search=False):
+    """
+    Derives how many more searches are needed from the point status
+    :param status: point status dict, see point_status_from_texts
+    :param mobile_search: Boolean, True for mobile points, default false for pc and edge points
+    :return: Int number of searches
+    """
+    if mobile_search:
+        remaining = status['mobile'][1] - status['mobile'][0]
+    else:
+        # edge points come from the same searches as pc points, with the edge user agent
+        remaining = max(status['pc'][1] - status['pc'][0], status['edge'][1] - status['edge'][0])
+    return max(0, -(-remaining // POINTS_PER_SEARCH))
+
+
+def search_gain(before, after, mobile_search=False):
+    """
+    Gets the search points gained between two point statuses, counted like searches_needed plans them
+    :param before: point status dict, see point_status_from_texts
+    :param after: later point status dict
+    :param mobile_search: Boolean, True for mobile points, default false for pc and edge points
+    :return: Int points
+    """
+    if mobile_search:
+        return after['mobile'][0] - before['mobile'][0]
+    # one search with the edge user agent earns pc and edge points, count it once
+    return max(after['pc'][0] - before['pc'][0], after['edge'][0] - before['edge'][0])
+
+
+def status_before_searches(status, searches):
+    """
+    Estimates the point status before searches that ran while it was unreadable, assumes each of them earned points
+    :param status: point status dict, see point_status_from_texts
+    :param searches: Int searches issued before status was read
+    :return: point status dict
+    """
+    return {key: value if key == 'total' else [max(0, value[0] - searches * POINTS_PER_SEARCH), value[1]]
+            for key, value in status.items()}
+
+
+def wasted_searches(issued, gained):
+    """
+    Gets the searches that earned no points
+    :param issued: Int searches issued
+    :param gained: Int search points gained, see search_gain
+    :return: Int searches
+    """
+    return max(0, issued - gained // POINTS_PER_SEARCH)
+
+
+def search_term(num, item):
+    """
+    Enters one search term into the bing search bar
+    :param num: Int number of the search term
+    :param item: String search term
+    :return: None
+    """
+    try:
+        # clears search bar and enters in next search term
+        SEARCH_PAGE.search_box.clear(time_to_wait=30)
+        # the previous results page already has b_results, wait for the navigation before looking for it
+        search_url = browser.current_url
+        SEARCH_PAGE.search_box.send_keys(item, Keys.RETURN)
+        # the results are a new page, locate the search bar there fresh
+        SEARCH_PAGE.forget()
+        # prints search term and item, limited to 80 chars
+        logging.debug(msg=f'Search #{num}: {item[:80]}')
+        # wait for results, then pace for more human-like, and let ms reward website keep up.
+        wait_until_url_changes(search_url, 10, site='search navigation')
+        wait_until_present(By.ID, 'b_results', 10, site='search results')
+        pace('search')
+    except UnexpectedAlertPresentException:
+        # this captures alerts such as bing asking for location information for certain search terms
+        logging.info(msg='Unexpected alert during search, returning to search URL')
+        browser.get(BING_SEARCH_URL)
+    except (NoSuchElementException, ElementNotVisibleException, ElementNotInteractableException):
+        logging.exception(msg=f'Search bar not usable for search #{num}, returning to search URL')
+        screenshot('sb_form_q')
+        browser.get(BING_SEARCH_URL)
+
+
+def record_search_metrics(phase, issued, gained):
+    """
+    Adds searches issued and points gained to the account's entry for the phase,
+    a phase run again after a browser recycle keeps one entry
+    :param phase: String phase name, mobile_search or pc_search
+    :param issued: Int searches issued
+    :param gained: Int search points gained
+    :return: None
+    """
+    for metric in SEARCH_METRICS:
+        if metric['account'] == current_account and metric['phase'] == phase:
+            break
+    else:
+        metric = {'account': current_account, 'phase': phase, 'issued': 0, 'gained': 0}
+        SEARCH_METRICS.append(metric)
+    metric['issued'] += issued
+    metric['gained'] += gained
+    logging.info(msg=f'{phase} searches issued = {metric["issued"]}, points gained = {metric["gained"]}, '
+                     f'wasted searches = {wasted_searches(metric["issued"], metric["gained"])}')
+
+
+def search(search_terms, mobile_search=False):
+    """
+    Searches only as many terms as the point status says are still needed,
+    re-checks points once that many are done and plans again if points are still missing
+    :param search_terms: iterable of numbered search terms, see get_search_terms
+    :param mobile_search: Boolean, True for mobile search points, default false for pc and edge search points
+    :return: Boolean, True if the point status says no more searches are needed
+    """
+    # named like the phase spans so search metrics join the other per phase series
+    phase = 'mobile_search' if mobile_search else 'pc_search'
+    logging.info(msg="Search Start")
+    if search_terms is None:
+        logging.info(msg="Search Aborted. No Search Terms.")
+        return False
+
+    browser.get(BING_SEARCH_URL)
+    # ensure signed in not in mobile mode (pc mode doesn't register when searching)
+    if not mobile_search:
+        ensure_pc_mode_logged_in()
+
+    status = get_point_status()
+    if status is not None:
+        needed = searches_needed(status, mobile_search)
+    elif mobile_search:
+        # in mobile mode, get point total does not work if no search is done, URL = 404
+        needed = 1
+    else:
+        needed = DEFAULT_SEARCH_LIMIT[phase]
+    start_status = status
+    last_status = status
+    # only a readable point status can tell the target was met
+    met = status is not None and needed == 0
+    logging.info(msg=f'Planned {needed} {phase} searches')
+
+    terms = iter(search_terms)
+    issued = 0
+    try:
+        for search_round in range(MAX_SEARCH_ROUNDS):
+            if needed == 0:
+                break
+            if left_search_page():
+                browser.get(BING_SEARCH_URL)
+            searched = 0
+            for _ in range(needed):
+                # before taking a term, a term taken is marked used even if a recycle drops it
+                memory_checkpoint()
+                next_term = next(terms, None)
+                if next_term is None:
+                    break
+                num, item = next_term
+                with span('search_term', phase=phase):
+                    search_term(num, item)
+                searched += 1
+            issued += searched
+            if searched < needed:
+                logging.info(msg=f'Ran out of search terms after {issued} searches')
+                break
+
+            # searches planned so far should have met the target, check
+            status = get_point_status()
+            if status is None:
+                needed = DEFAULT_SEARCH_LIMIT[phase] if start_status is None and search_round == 0 else 0
+                logging.info(msg=f'Point status unavailable, {needed} more searches')
+                continue
+            if start_status is None:
+                # first readable status, the blind searches before it count as gained
+                start_status = status_before_searches(status, issued)
+            elif search_gain(last_status, status, mobile_search) == 0:
+                logging.info(msg=f'No points gained over the last {searched} searches, stopping')
+                break
+            last_status = status
+            needed = searches_needed(status, mobile_search)
+            met = needed == 0
+            logging.info(msg=f'{needed} {phase} searches still needed after {issued}')
+    finally:
+        # also counts the searches of an attempt cut short by a browser recycle
+        gained = search_gain(start_status, last_status, mobile_search) if start_status is not None else 0
+        record_search_metrics(phase, issued, gained)
+    return met
+
+
+def iter_dailies(pipelined=False):
+    """
+    Iterates through all outstanding dailies
+    :param pipelined: Boolean, True to open all offers at once, see complete_offers_pipelined
+    :return: Boolean, True if no offers are left open on the dashboard
+    """
+    browser.get(DASHBOARD_URL)
+    wait_until_present(By.XPATH, DASHBOARD_ICON_XPATH, 15, site='dashboard')
+    # TODO there is an error here where the object cannot be converted to data, only happens on digital ocean
+    #   may be related to a wait after a sleep.
+    #   stack overflow states that it is likely related to ram, need 2gb over 1gb.
+    open_offers = browser.find_elements_by_xpath(OPEN_OFFER_XPATH)
+    if open_offers:
+        logging.info(msg=f'Number of incomplete offers: {len(open_offers)}')
+        # get common parent element of open_offers
+        parent_elements = [open_offer.find_element_by_xpath('..//..//..//..') for open_offer in open_offers]
+        # get points links from parent, # finds ng-transclude descendant of selected node
+        offer_links = [parent.find_element_by_xpath('descendant::ng-transclude') for parent in parent_elements]
+        offers = []
+        for offer in offer_links:
+            offer_title = offer.text.strip()
+            if journal_done(current_account, 'dailies', offer_title):
+                logging.info(msg=f'Offer {offer_title} already completed today, skipping.')
+                continue
+            offers.append((offer_title, offer))
+        if pipelined:
+            complete_offers_pipelined(offers)
+        else:
+            # iterate through the dailies
+            for offer_title, offer in offers:
+                memory_checkpoint()
+                with span('offer') as tags:
+                    tags['type'] = complete_offer(offer)
+                if tags['type'] != 'unknown':
+                    record_done(current_account, 'dailies', offer_title)
+        # check at the end of the loop to log if any offers are remaining
+        browser.get(DASHBOARD_URL)
+        wait_until_present(By.XPATH, DASHBOARD_ICON_XPATH, 15, site='dashboard')
+        open_offers = browser.find_elements_by_xpath(OPEN_OFFER_XPATH)
+        logging.info(msg=f'Number of incomplete offers remaining: {len(open_offers)}')
+    else:
+        logging.info(msg='No dailies found.')
+    return not open_offers
+
+
+def classify_offer(quiz_started=False):
+    """
+    Detects the offer type of the current window from its markers, read in a single round trip
+    :param quiz_started: Boolean, True once rqStartQuiz was clicked, to tell quiz types apart
+    :return: OfferDescriptor
+    """
+    markers = browser.execute_script(OFFER_MARKERS_JS)
+    if quiz_started:
+        # test for drag or drop or regular quiz, then look for lightning quiz indicator
+        if markers['drag_and_drop']:
+            offer_type = 'drag_and_drop'
+        elif markers['lightning']:
+            offer_type = 'lightning'
+        else:
+            offer_type = 'quiz'
+    elif markers['poll']:
+        offer_type = 'poll'
+    elif markers['start_quiz']:
+        offer_type = 'quiz'
+    elif markers['click']:
+        offer_type = 'click'
+    else:
+        offer_type = 'explore'
+    return OfferDescriptor(offer_type, browser.current_url, browser.title, markers)
+
+
+def wait_for_quiz_type(time_to_wait=10):
+    """
+    Waits for a started quiz to show the markers of its type
+    :param time_to_wait: Int time to wait
+    :return: OfferDescriptor, type stays quiz if no known type showed up
+    """
+    started = time.time()
+    descriptor = classify_offer(quiz_started=True)
+    while descriptor.type == 'quiz' and time.time() - started < time_to_wait:
+        time.sleep(0.25)
+        descriptor = classify_offer(quiz_started=True)
+    record_wait('quiz start', started)
+    return descriptor
+
+
+def complete_offer(offer):
+    """
+    Opens an offer in a new window, completes it and closes the window
+    :param offer: selenium object of the offer link
+    :return: String offer type, see OfferDescriptor, unknown for unrecognized quizzes
+    """
+    pace('offer')
+    logging.debug(msg='Detected offer.')
+    # click and switch focus to latest window
+    offer.click()
+    latest_window()
+    wait_until_page_ready(15, site='offer load')
+    try:
+        return solve_offer()
+    finally:
+        main_window()
+
+
+def solve_offer():
+    """
+    Classifies the offer in the current window and completes it, leaves the window open
+    :return: String offer type, see OfferDescriptor, unknown for unrecognized quizzes
+    """
+    descriptor = classify_offer()
+    # check for sign-in prompt
+    if descriptor.markers['sign_in']:
+        sign_in_prompt()
+        descriptor = classify_offer()
+    if descriptor.type == 'quiz':
+        click_by_id('rqStartQuiz')
+        descriptor = wait_for_quiz_type()
+    logging.debug(msg=f'Offer identified: {descriptor.type}')
+
+    solvers = {
+        'poll': daily_poll,
+        'drag_and_drop': drag_and_drop_quiz,
+        'lightning': lightning_quiz,
+        'click': click_quiz,
+        # else do scroll for exploring pages
+        'explore': explore_daily,
+    }
+    if descriptor.type in solvers:
+        solvers[descriptor.type]()
+        return descriptor.type
+    logging.warning(msg=f'Unknown offer layout: {descriptor}')
+    return 'unknown'
+
+
+def next_ready_tab(handles, time_to_wait=15):
+    """
+    Switches to the first tab whose document has finished loading, or the oldest once time_to_wait runs out
+    :param handles: list of window handles, oldest first
+    :param time_to_wait: Int seconds to wait for any tab to be ready
+    :return: String window handle switched to
+    """
+    started = time.time()
+    try:
+        while True:
+            for handle in handles:
+                browser.switch_to.window(handle)
+                if browser.execute_script('return document.readyState') == 'complete':
+                    return handle
+            if time.time() - started > time_to_wait:
+                logging.info(msg='No offer tab finished loading, taking the oldest.')
+                browser.switch_to.window(handles[0])
+                return handles[0]
+            time.sleep(0.25)
+    finally:
+        record_wait('offer load', started)
+
+
+def complete_offers_pipelined(offers):
+    """
+    Opens every offer in its own tab up front, then completes whichever tab has loaded next,
+    so offers load while others are being solved
+    :param offers: list of (String title, selenium object of the offer link)
+    :return: None
+    """
+    main_handle = browser.current_window_handle
+    tabs = {}
+    for offer_title, offer in offers:
+        pace('offer')
+        before = set(browser.window_handles)
+        offer.click()
+        opened = [handle for handle in browser.window_handles if handle not in before]
+        if opened:
+            tabs[opened[0]] = offer_title
+        else:
+            logging.warning(msg=f'Offer {offer_title} did not open a tab.')
+        # focus can follow the new tab, the next offer link is on the dashboard
+        browser.switch_to.window(main_handle)
+    logging.info(msg=f'Opened {len(tabs)} offer tabs.')
+
+    while tabs:
+        memory_checkpoint()
+        handle = next_ready_tab(list(tabs))
+        offer_title = tabs.pop(handle)
+        try:
+            with span('offer') as tags:
+                tags['type'] = solve_offer()
+        finally:
+            # close just this offer's tab, the others are still loading or waiting
+            for extra in browser.window_handles:
+                if extra != main_handle and extra not in tabs:
+                    browser.switch_to.window(extra)
+                    browser.close()
+            browser.switch_to.window(main_handle)
+        if tags['type'] != 'unknown':
+            record_done(current_account, 'dailies', offer_title)
+
+
+def explore_daily():
+    # needs try/except bc these functions don't have exception handling built in.
+    try:
+        # select html to send commands to
+        html = browser.find_element_by_tag_name('html')
+        # scroll up and down to trigger points
+        for i in range(3):
+            html.send_keys(Keys.END)
+            html.send_keys(Keys.HOME)
+    except TimeoutException:
+        logging.exception(msg='Explore Daily Timeout Exception.')
+    except (ElementNotVisibleException, ElementClickInterceptedException, ElementNotInteractableException):
+        logging.exception(msg='Element not clickable or visible.')
+    except WebDriverException:
+        logging.exception(msg='Error.')
+
+
+def daily_poll():
+    """
+    Randomly clicks a poll answer
+    :return: None
+    """
+    # click poll option
+    choices = ['btoption0', 'btoption1']  # new poll format
+    try:
+        CachedElement(By.ID, random.choice(choices)).click()
+    except WebDriverException:
+        logging.exception(msg='Error clicking poll option.')
+    # no marker for a counted vote, give it the pacing floor
+    pace('daily poll')
+
+
+def quiz_fingerprint(state):
+    """
+    Gets a stable key for a quiz question from its text and sorted option texts
+    :param state: dict from QUIZ_STATE_JS
+    :return: String hex digest
+    """
+    texts = [state['question']] + sorted(option['text'] for option in state['options'])
+    return hashlib.sha1('\n'.join(texts).encode()).hexdigest()
+
+
+def load_quiz_answers():
+    """
+    Loads today's known quiz answers from disk once per run
+    :return: dict of question fingerprint to {'date': String, 'answer': String option text}
+    """
+    global quiz_answers
+    if quiz_answers is None:
+        try:
+            with open(QUIZ_ANSWERS_PATH, 'r') as f:
+                quiz_answers = json.load(f)
+        except (OSError, ValueError):
+            quiz_answers = {}
+        # quizzes change daily, forget older answers
+        quiz_answers = {key: entry for key, entry in quiz_answers.items() if entry['date'] == today()}
+    return quiz_answers
+
+
+def record_quiz_answer(state, answer):
+    """
+    Remembers the correct option of a quiz question for later accounts and runs today
+    :param state: dict from QUIZ_STATE_JS
+    :param answer: String text of the correct option
+    :return: None
+    """
+    answers = load_quiz_answers()
+    key = quiz_fingerprint(state)
+    if answers.get(key, {}).get('answer') == answer:
+        return
+    answers[key] = {'date': today(), 'answer': answer}
+    os.makedirs(os.path.dirname(QUIZ_ANSWERS_PATH), exist_ok=True)
+    try:
+        with open(f'{QUIZ_ANSWERS_PATH}.tmp', 'w') as f:
+            json.dump(answers, f)
+        os.replace(f'{QUIZ_ANSWERS_PATH}.tmp', QUIZ_ANSWERS_PATH)
+    except OSError:
+        logging.exception(msg='Error writing quiz answers.')
+
+
+def known_answer_first(state):
+    """
+    Orders option indexes with the remembered answer, if any, first
+    :param state: dict from QUIZ_STATE_JS
+    :return: list of Int option indexes
+    """
+    answer = load_quiz_answers().get(quiz_fingerprint(state), {}).get('answer')
+    indexes = list(range(len(state['options'])))
+    return sorted(indexes, key=lambda index: state['options'][index]['text'] != answer)
+
+
+def read_quiz_state(option_class, question_selector):
+    """
+    Reads the current quiz question and options in one round trip
+    :param option_class: String class of the answer options
+    :param question_selector: String css selector of the question text
+    :return: dict from QUIZ_STATE_JS
+    """
+    return browser.execute_script(QUIZ_STATE_JS, option_class, question_selector)
+
+
+def wait_for_quiz_state(option_class, question_selector, old_state, time_to_wait=5, site='quiz'):
+    """
+    Waits until the quiz question or option marks differ from old_state
+    :param option_class: String class of the answer options
+    :param question_selector: String css selector of the question text
+    :param old_state: dict from QUIZ_STATE_JS read before the click
+    :param time_to_wait: Int time to wait
+    :param site: String name of the call site
+    :return: dict from QUIZ_STATE_JS, the last state read
+    """
+    started = time.time()
+    state = read_quiz_state(option_class, question_selector)
+    while state == old_state and time.time() - started < time_to_wait:
+        time.sleep(0.1)
+        state = read_quiz_state(option_class, question_selector)
+    record_wait(site, started)
+    return state
+
+
+def lightning_quiz():
+    """
+    Answers each lightning quiz question, clicking the answer remembered from earlier accounts first
+    :return: None
+    """
+    for question_round in range(10):
+        logging.debug(msg=f'Round# {question_round}')
+        wait_until_present(By.CLASS_NAME, 'rqOption', 10, site='lightning quiz')
+        state = read_quiz_state('rqOption', '.rqQuestion')
+        # iterate through choices, known answer first
+        # wrong answers only restyle the options, the elements stay the same for the whole question
+        click_choices = find_by_class('rqOption')
+        for index in known_answer_first(state):
+            if index >= len(click_choices):
+                break
+            try:
+                displayed = click_choices[index].is_displayed()
+            except StaleElementReferenceException:
+                # options were redrawn after all, locate them again
+                click_choices = find_by_class('rqOption')
+                displayed = index < len(click_choices) and click_choices[index].is_displayed()
+            # if greyed out, or not visible, skip it
+            if not displayed:
+                continue
+            choice = click_choices[index]
+            logging.debug(msg=f'Clicked {choice}')
+            choice.click()
+            new_state = wait_for_quiz_state('rqOption', '.rqQuestion', state, 5, site='lightning quiz')
+            # moving on to the next question also means the click was right
+            if new_state['question'] != state['question'] or \
+                    (index < len(new_state['options']) and new_state['options'][index]['correct']):
+                record_quiz_answer(state, state['options'][index]['text'])
+                break
+            state = new_state
+        if find_by_id('quizCompleteContainer'):
+            break
+    # close the quiz completion splash
+    if wait_until_clickable(By.CSS_SELECTOR, '.cico.btCloseBack', 10, site='quiz complete'):
+        find_by_css('.cico.btCloseBack')[0].click()
+
+
+def click_quiz():
+    """
+    Answers each click quiz question with the answer remembered from earlier accounts, or a random guess,
+    and remembers the answer marked correct
+    :return: None
+    """
+    # start the quiz, iterates 10 times
+    for i in range(10):
+        close_back = find_by_css('.cico.btCloseBack')
+        if close_back:
+            close_back[0].click()
+            logging.debug(msg='Quiz popped up during a click quiz...')
+        state = read_quiz_state('wk_Circle', '.wk_question')
+        choices = find_by_class('wk_Circle')
         # click answer
         if choices:
-            random.choice(choices).click()
-            time.sleep(3)
-        # click the 'next question' button
-        wait_until_clickable(By.ID, 'check', 10)
-        click_by_id('check')
+            answer = load_quiz_answers().get(quiz_fingerprint(state), {}).get('answer')
+            texts = [option['text'] for option in state['options']]
+            choice = texts.index(answer) if answer in texts else random.randrange(len(choices))
+            choices[min(choice, len(choices) - 1)].click()
+            state = read_quiz_state('wk_Circle', '.wk_question')
+        # click the 'next question' button, the same element for every question
+        try:
+            CLICK_QUIZ_PAGE.check.click()
+        except WebDriverException:
+            logging.exception(msg='Error clicking click quiz check button.')
+        # remember the answer marked correct
+        new_state = wait_for_quiz_state('wk_Circle', '.wk_question', state, 5, site='click quiz')
+        if new_state['question'] == state['question']:
+            for option in new_state['options']:
+                if option['correct']:
+                    record_quiz_answer(state, option['text'])
         # if the green check mark reward icon is visible, end loop
-        time.sleep(3)
         if find_by_css('span[class="rw_icon"]'):
             break
-    main_window()
 
 
 def drag_and_drop_quiz():
     """
-    Checks for drag quiz answers and exits when none are found.
+    Solves each drag and drop question as a permutation. The first wrong position is swapped with options not yet
+    tried there, correctAnswer marks after every swap fix positions and rule out candidates, so a question of
+    n options takes at most n * n swaps.
     :return: None
     """
-    for i in range(100):
-        try:
-            # find possible solution buttons
-            drag_option = find_by_class('rqOption')
-            # find any answers marked correct with correctAnswer tag
-            right_answers = find_by_class('correctAnswer')
-            # remove right answers from possible choices
-            if right_answers:
-                drag_option = [x for x in drag_option if x not in right_answers]
-            if drag_option:
-                # select first possible choice and remove from options
-                choice_a = random.choice(drag_option)
-                drag_option.remove(choice_a)
-                # select second possible choice from remaining options
-                choice_b = random.choice(drag_option)
-                ActionChains(browser).drag_and_drop(choice_a, choice_b).perform()
-        except (WebDriverException, TypeError):
-            logging.debug(msg='Unknown Error.')
-            continue
-        finally:
-            time.sleep(3)
-            if find_by_id('quizCompleteContainer'):
+    total_swaps = 0
+    question_swaps = 0
+    question = None
+    # position -> option texts already seen marked wrong there
+    tried = defaultdict(set)
+    while total_swaps < MAX_DRAG_AND_DROP_SWAPS:
+        state = browser.execute_script(DRAG_AND_DROP_STATE_JS)
+        options = state['options']
+        if state['complete'] or not options:
+            break
+        texts = sorted(option['text'] for option in options)
+        if texts != question:
+            # new question, forget what was tried on the last one
+            if question is not None:
+                logging.info(msg=f'Drag and drop question solved in {question_swaps} swaps')
+            question = texts
+            question_swaps = 0
+            tried.clear()
+        for position, option in enumerate(options):
+            if not option['correct']:
+                tried[position].add(option['text'])
+        wrong = [position for position, option in enumerate(options) if not option['correct']]
+        if not wrong:
+            # solved, wait for the next question or the completion splash
+            if not wait_for(lambda driver: driver.execute_script(DRAG_AND_DROP_STATE_JS) != state, 10,
+                            site='drag and drop quiz'):
                 break
+            continue
+
+        target = wrong[0]
+        candidates = [position for position in wrong[1:] if options[position]['text'] not in tried[target]]
+        if not candidates:
+            # marks contradict what was tried, start this position over
+            tried[target].clear()
+            candidates = wrong[1:] or [target]
+        # prefer a swap that could also fix the candidate's own position
+        candidates.sort(key=lambda position: options[target]['text'] in tried[position])
+        source = candidates[0]
+        try:
+            elements = find_by_class('rqOption')
+            ActionChains(browser).drag_and_drop(elements[source], elements[target]).perform()
+        except (WebDriverException, IndexError):
+            logging.debug(msg='Drag and drop swap failed.')
+        total_swaps += 1
+        question_swaps += 1
+        # wait for the correctAnswer marks to update
+        wait_for(lambda driver: driver.execute_script(DRAG_AND_DROP_STATE_JS) != state, 5,
+                 site='drag and drop quiz')
+    logging.info(msg=f'Drag and drop quiz took {total_swaps} swaps')
     # close the quiz completion splash
-    time.sleep(3)
-    find_by_css('.cico.btCloseBack')[0].click()
-    time.sleep(3)
-    main_window()
+    if wait_until_clickable(By.CSS_SELECTOR, '.cico.btCloseBack', 10, site='quiz complete'):
+        find_by_css('.cico.btCloseBack')[0].click()
 
 
 def sign_in_prompt():
-    time.sleep(3)
     sign_in_prompt_msg = find_by_class('simpleSignIn')
     if sign_in_prompt_msg:
         logging.info(msg='Detected sign-in prompt')
         browser.find_element_by_link_text('Sign in').click()
         logging.info(msg='Clicked sign-in prompt')
-        time.sleep(4)
+        # prompt is gone once the signed in page reloads
+        wait_for(ec.staleness_of(sign_in_prompt_msg[0]), 10, site='sign-in prompt')
+        wait_until_page_ready(10, site='sign-in prompt')
 
 
-def get_point_total(pc=False, mobile=False, log=False):
+class PointStatusParser(HTMLParser):
     """
-    Checks for points for pc/edge and mobile, logs if flag is set
-    :return: Boolean for either pc/edge or mobile points met
+    Collects the text of the first element carrying each of the point status classes
+    """
+    def __init__(self):
+        super().__init__()
+        self.texts = {}
+        # class name -> [depth of open tags, list of text chunks]
+        self._capturing = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        for capture in self._capturing.values():
+            capture[0] += 1
+        classes = (dict(attrs).get('class') or '').split()
+        for class_name in POINT_STATUS_CLASSES:
+            if class_name in classes and class_name not in self.texts and class_name not in self._capturing:
+                self._capturing[class_name] = [1, []]
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        for class_name, capture in list(self._capturing.items()):
+            capture[0] -= 1
+            if capture[0] == 0:
+                self.texts[class_name] = ' '.join(''.join(capture[1]).split())
+                del self._capturing[class_name]
+
+    def handle_data(self, data):
+        for capture in self._capturing.values():
+            capture[1].append(data)
+
+
+def point_status_from_texts(texts):
+    """
+    Converts the text of the point status elements to numbers
+    :param texts: dict of point status class name to element text
+    :return: dict with 'total' int and [current, max] lists for 'pc', 'mobile' and 'edge'
+    """
+    # drop thousands separators
+    texts = {class_name: text.replace(',', '') for class_name, text in texts.items()}
+    try:
+        return {
+            # total points, capped to current item on wishlist
+            'total': int(texts['credits2'].split(' of ')[0]),
+            'pc': list(map(int, texts['pcsearch'].split('/'))),
+            'mobile': list(map(int, texts['mobilesearch'].split('/'))),
+            'edge': list(map(int, texts['edgesearch'].split('/'))),
+        }
+    except KeyError as e:
+        raise ValueError(f'Point status element {e} not found') from e
+
+
+def parse_point_status(html):
+    """
+    Parses the point total flyout page, works on saved html as well as a live response
+    :param html: String html of the flyout page
+    :return: point status dict, see point_status_from_texts
+    """
+    status_parser = PointStatusParser()
+    status_parser.feed(html)
+    status_parser.close()
+    return point_status_from_texts(status_parser.texts)
+
+
+def seed_status_session():
+    """
+    Copies the browser's user agent and current domain cookies into the shared status session
+    :return: requests.Session
+    """
+    global status_session
+    if status_session is None:
+        status_session = requests.Session()
+    status_session.headers['User-Agent'] = browser.execute_script('return navigator.userAgent')
+    for cookie in browser.get_cookies():
+        # keep the secure flag so auth cookies are never sent over plain http, as the browser would
+        status_session.cookies.set(cookie['name'], cookie['value'],
+                                   domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                                   secure=cookie.get('secure', False),
+                                   rest={'HttpOnly': None} if cookie.get('httpOnly') else {})
+    return status_session
+
+
+def browser_point_status():
+    """
+    Gets point status by loading the flyout page in the browser, used when the http client fails
+    :return: point status dict, or None if the page could not be read
     """
     browser.get(POINT_TOTAL_URL)
-    # get number of total number of points
-    time.sleep(0.1)
     try:
         wait_until_visible(By.CLASS_NAME, 'credits2', 15)
-        # get total points, capped to current item on wishlist
-        current_point_total = list(map(int, browser.find_element_by_class_name('credits2').text.split(' of ')))[0]
-        # get pc points
-        current_pc_points, max_pc_points = map(int, browser.find_element_by_class_name('pcsearch').text.split('/'))
-        # get mobile points
-        current_mobile_points, max_mobile_points = \
-            map(int, browser.find_element_by_class_name('mobilesearch').text.split('/'))
-        # get edge points
-        current_edge_points, max_edge_points = map(int,
-                                                   browser.find_element_by_class_name('edgesearch').text.split('/'))
-        # if log flag is provided, log the point totals
-        if log:
-            logging.info(msg=f'Total points = {current_point_total}')
-            logging.info(msg=f'PC points = {current_pc_points}/{max_pc_points}')
-            logging.info(msg=f'Edge points = {current_edge_points}/{max_edge_points}')
-            logging.info(msg=f'Mobile points = {current_mobile_points}/{max_mobile_points}')
-
-        # if pc flag, check if pc and edge points met
-        if pc:
-            if current_pc_points < max_pc_points or current_edge_points < max_edge_points:
-                return False
-            return True
-        # if mobile flag, check if mobile points met
-        if mobile:
-            if current_mobile_points < max_mobile_points:
-                return False
-            return True
-    except (NoSuchElementException, TimeoutException):
+        return point_status_from_texts({class_name: browser.find_element_by_class_name(class_name).text
+                                        for class_name in POINT_STATUS_CLASSES})
+    except (NoSuchElementException, TimeoutException, ValueError):
+        return None
+
+
+def get_point_status():
+    """
+    Gets point status over http with the browser's cookies so the browser stays on its page,
+    falls back to loading the flyout in the browser
+    :return: point status dict, or None if unavailable
+    """
+    with span('get_point_total') as tags:
+        try:
+            response = seed_status_session().get(POINT_TOTAL_URL, timeout=10)
+            response.raise_for_status()
+            tags['source'] = 'http'
+            status = parse_point_status(response.text)
+        except (RequestException, ValueError) as e:
+            logging.debug(msg=f'Point status over http failed, using browser: {e}')
+            tags['source'] = 'browser'
+            status = browser_point_status()
+    if status is not None:
+        # kept for the account summary
+        account_points.setdefault('before', status['total'])
+        account_points['after'] = status['total']
+    return status
+
+
+def get_point_total(pc=False, mobile=False, log=False):
+    """
+    Checks for points for pc/edge and mobile, logs if flag is set
+    :return: Boolean for either pc/edge or mobile points met
+    """
+    status = get_point_status()
+    if status is None:
         return False
+    current_pc_points, max_pc_points = status['pc']
+    current_mobile_points, max_mobile_points = status['mobile']
+    current_edge_points, max_edge_points = status['edge']
+    # if log flag is provided, log the point totals
+    if log:
+        logging.info(msg=f'Total points = {status["total"]}')
+        logging.info(msg=f'PC points = {current_pc_points}/{max_pc_points}')
+        logging.info(msg=f'Edge points = {current_edge_points}/{max_edge_points}')
+        logging.info(msg=f'Mobile points = {current_mobile_points}/{max_mobile_points}')
+
+    # if pc flag, check if pc and edge points met
+    if pc:
+        if current_pc_points < max_pc_points or current_edge_points < max_edge_points:
+            return False
+        return True
+    # if mobile flag, check if mobile points met
+    if mobile:
+        if current_mobile_points < max_mobile_points:
+            return False
+        return True
+
+
+def left_search_page():
+    """
+    Checks if the browser fell back to loading the point total flyout
+    :return: Boolean
+    """
+    return urlsplit(browser.current_url).path == urlsplit(POINT_TOTAL_URL).path
 
 
 def get_email_links():
     """
-    Gets the email links from the text file, appends to a list
+    Gets the email links from the text file, stripped, without blank lines or repeats
     :return: List of string URLs
     """
-    with open('email_links.txt', 'r') as f:
-        links = []
-        for link in f.readlines():
-            links.append(link)
+    with open(EMAIL_LINKS_PATH, 'r') as f:
+        # dict keeps the first occurrence of each link in file order
+        links = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    logging.info(msg=f'{len(links)} unique email links.')
     return links
 
 
-def click_email_links(links):
+def check_email_link(session, link):
     """
-    Receives list of string URLs and clicks through them.
-    Manual mode only, quizzes are still in flux and not standardized yet.
+    Follows a link's redirects without downloading the page
+    :param session: requests.Session
+    :param link: String URL
+    :return: Boolean, True if the link ends on a page that loads
+    """
+    try:
+        with session.get(link, timeout=EMAIL_LINK_TIMEOUT, stream=True) as response:
+            return response.status_code < 400
+    except RequestException:
+        return False
+
+
+def validate_email_links(links):
+    """
+    Drops dead and expired links, checking them concurrently over one pooled session.
+    The browser still opens the original links, their redirects may be tied to the signed in session.
     :param links: List of string URLs
-    :return: None
+    :return: List of string URLs that resolved
+    """
+    if not links:
+        return links
+    workers = min(EMAIL_LINK_WORKERS, len(links))
+    with requests.Session() as session:
+        session.headers['User-Agent'] = PC_USER_AGENT
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            alive = list(executor.map(lambda link: check_email_link(session, link), links))
+    live_links = [link for link, ok in zip(links, alive) if ok]
+    logging.info(msg=f'{len(live_links)}/{len(links)} email links resolved.')
+    return live_links
+
+
+def click_email_links(links, batch_size=5, unattended=False):
     """
-    for link in links:
-        browser.get(link)
-        input('Press any key to continue.')
+    Receives list of string URLs and opens them in batches of tabs.
+    Waits for a key press after each batch unless unattended, quizzes are still in flux and not standardized yet.
+    :param links: List of string URLs
+    :param batch_size: Int number of tabs open at once
+    :param unattended: Boolean, True to only wait for the pages to load
+    :return: Boolean, True once every link was opened
+    """
+    for start in range(0, len(links), batch_size):
+        batch = links[start:start + batch_size]
+        for link in batch:
+            browser.execute_script('window.open(arguments[0], "_blank");', link)
+        for handle in browser.window_handles[1:]:
+            browser.switch_to.window(handle)
+            wait_until_page_ready(15, site='email_link')
+        logging.info(msg=f'Opened email links {start + 1}-{start + len(batch)} of {len(links)}.')
+        if not unattended:
+            input('Press any key to continue.')
+        main_window()
+    return True
 
 
 def ensure_pc_mode_logged_in():
@@ -674,91 +2729,304 @@ def ensure_pc_mode_logged_in():
     :return: None
     """
     browser.get(BING_SEARCH_URL)
-    time.sleep(0.1)
     # click on ribbon to ensure logged in
     wait_until_clickable(By.ID, 'id_l', 15)
     click_by_id('id_l')
-    time.sleep(0.1)
+    wait_until_page_ready(10, site='ensure_pc_mode_logged_in')
 
 
-if __name__ == '__main__':
+def run_phase(email, phase, phase_func, *args):
+    """
+    Runs a phase in its span and journals it once its target is met, an abort stops just this phase
+    :param email: String account name
+    :param phase: String phase name
+    :param phase_func: function of the phase, returns True if its target was met
+    :param args: phase_func arguments
+    :return: Boolean, True if the phase finished
+    """
     try:
-        # start logging
-        init_logging()
-        logging.info(msg='---------------------------------')
-        logging.info(msg='--------------New----------------')
-        logging.info(msg='---------------------------------')
+        with span('phase', phase=phase):
+            met = run_recyclable(phase_func, *args)
+    except PhaseAborted as e:
+        logging.error(msg=f'Phase {phase} aborted: {e}')
+        return False
+    if not met:
+        # left for the next run of the day
+        logging.info(msg=f'Phase {phase} ended short of its target, not journaled.')
+        return False
+    record_done(email, phase)
+    return True
 
-        # argparse
-        parser = parse_args()
-        logging.info(msg='args parsed.')
 
+def run_account(email, password, parser, search_list, email_links, prewarm_next=False):
+    """
+    Runs the selected phases for one account that are not in today's journal yet
+    :param email: String account name
+    :param password: String
+    :param parser: argparse object
+    :param search_list: iterable of numbered search terms, see get_search_terms
+    :param email_links: List of string URLs
+    :param prewarm_next: Boolean, True to launch the next account's browser once this one is signed in
+    :return: dict of the account summary, None if there was nothing left to do
+    """
+    global browser, status_session, current_account
+    mobile_todo = parser.mobile_mode and not journal_done(email, 'mobile_search')
+    pc_todo = parser.pc_mode and not journal_done(email, 'pc_search')
+    quiz_todo = parser.quiz_mode and not journal_done(email, 'dailies')
+    email_todo = parser.email_mode and not journal_done(email, 'email_links')
+    if not (mobile_todo or pc_todo or quiz_todo or email_todo):
+        logging.info(msg=f'All phases already completed today for {email}, skipping.')
+        return None
+    current_account = email
+    account_started = time.time()
+    # one browser and point status session per account, shared by the mobile and pc phases
+    browser = None
+    status_session = None
+    # the first phase of every account starts with this user agent
+    first_user_agent = MOBILE_USER_AGENT if parser.mobile_mode else PC_USER_AGENT
+
+    if mobile_todo:
+        # MOBILE MODE
+        logging.info(msg='***************MOBILE***************')
+        try:
+            # set up headless browser and mobile user agent
+            start_session(email, password, parser.headless_setting, MOBILE_USER_AGENT)
+            if prewarm_next:
+                prewarm_browser(parser.headless_setting, first_user_agent)
+            browser.get(BING_SEARCH_URL)
+            # mobile search
+            run_phase(email, 'mobile_search', search, search_list, True)
+            # get point totals if running just in mobile mode
+            if not pc_todo or not quiz_todo or not email_todo:
+                get_point_total(mobile=True, log=True)
+            save_cookies(email)
+        except KeyboardInterrupt:
+            pass
+        except (WebDriverException, PhaseAborted):
+            logging.info(msg=f'WebDriverException while executing mobile portion', exc_info=True)
+            # relaunch for the pc portion rather than reuse a broken browser
+            if browser is not None:
+                quit_browser(browser)
+                browser = None
+
+    if pc_todo or quiz_todo or email_todo:
+        # PC MODE
+        logging.info(msg='***************PC***************')
+        try:
+            # set up edge headless browser and edge pc user agent
+            start_session(email, password, parser.headless_setting, PC_USER_AGENT)
+            if prewarm_next:
+                prewarm_browser(parser.headless_setting, first_user_agent)
+            if pc_todo:
+                browser.get(BING_SEARCH_URL)
+                # pc edge search
+                run_phase(email, 'pc_search', search, search_list)
+            if quiz_todo:
+                # complete quizzes
+                run_phase(email, 'dailies', iter_dailies, parser.pipeline)
+            if email_todo:
+                run_phase(email, 'email_links', click_email_links, email_links, parser.email_batch, parser.unattended)
+            # ensure logged in, log points
+            ensure_pc_mode_logged_in()
+            save_cookies(email)
+            get_point_total(log=True)
+        except KeyboardInterrupt:
+            print('Stopping Script...')
+        except (WebDriverException, PhaseAborted):
+            logging.error(msg=f'WebDriverException while executing pc portion', exc_info=True)
+
+    if browser is not None:
+        quit_browser(browser)
+        browser = None
+    record_span('account', account_started)
+    summary = log_account_summary(email, account_started)
+    log_wait_stats()
+    logging.info(msg='\n\n')
+    return summary
+
+
+def run_once(parser, run_started, search_list=None):
+    """
+    Runs every account once, writes the run's metrics at the end
+    :param parser: argparse object
+    :param run_started: datetime of the start of the run
+    :param search_list: iterable of numbered search terms already being fetched, default fetches them here
+    :return: dict of the run result for the daemon status, error is set if the run failed
+    """
+    global journal, quiz_answers
+    result = {'started': run_started.isoformat(timespec='seconds'), 'finished': None, 'accounts': [], 'error': None}
+    if parser.profile:
+        start_profiling(run_started)
+    try:
         # get login dict
         login_dict = get_login_info()
         logging.info(msg='logins retrieved.')
 
         # get search terms
-        search_list = []
-        if parser.mobile_mode or parser.pc_mode:
-            search_list = get_search_terms()
+        if search_list is None and (parser.mobile_mode or parser.pc_mode):
+            # fetched in the background while the first browser starts and logs in
+            search_list = prefetch_search_terms(parser.geo, parser.cache_ttl * 3600)
 
         # get URLs from emailed links
         email_links = []
         if parser.email_mode:
-            email_links = get_email_links()
+            email_links = validate_email_links(get_email_links())
+
+        # phases completed earlier today, by runs that were interrupted
+        journal = load_journal()
+        logging.info(msg=f'{len(journal)} completed phases and offers in journal.')
+        # a daemon run may be on a new day
+        quiz_answers = None
+        # screenshots are once per selector per run
+        screenshot_selectors.clear()
 
         # iter through accounts, search, and complete quizzes
         login_dict_keys = list(login_dict.keys())
         random.shuffle(login_dict_keys)
         for dict_key in login_dict_keys:
-            email = dict_key
-            password = login_dict[dict_key]
-
-            if parser.mobile_mode:
-                # MOBILE MODE
-                logging.info(msg='***************MOBILE***************')
-                # set up headless browser and mobile user agent
-                browser = browser_setup(parser.headless_setting, MOBILE_USER_AGENT)
-                try:
-                    log_in(email, password)
-                    browser.get(BING_SEARCH_URL)
-                    # mobile search
-                    search(search_list, mobile_search=True)
-                    # get point totals if running just in mobile mode
-                    if not parser.pc_mode or not parser.quiz_mode or not parser.email_mode:
-                        get_point_total(mobile=True, log=True)
-                    browser.quit()
-                except KeyboardInterrupt:
-                    browser.quit()
-                except WebDriverException:
-                    logging.info(msg=f'WebDriverException while executing mobile portion', exc_info=True)
-                    browser.quit()
-
-            if parser.pc_mode or parser.quiz_mode or parser.email_mode:
-                # PC MODE
-                logging.info(msg='***************PC***************')
-                # set up edge headless browser and edge pc user agent
-                browser = browser_setup(parser.headless_setting, PC_USER_AGENT)
-                try:
-                    log_in(email, password)
-                    if parser.pc_mode:
-                        browser.get(BING_SEARCH_URL)
-                        # pc edge search
-                        search(search_list)
-                    if parser.quiz_mode:
-                        # complete quizzes
-                        iter_dailies()
-                    if parser.email_mode:
-                        click_email_links(email_links)
-                    # ensure logged in, log points
-                    ensure_pc_mode_logged_in()
-                    get_point_total(log=True)
-                except KeyboardInterrupt:
-                    print('Stopping Script...')
-                except WebDriverException:
-                    logging.error(msg=f'WebDriverException while executing pc portion', exc_info=True)
-                finally:
-                    browser.quit()
-            logging.info(msg='\n\n')
-    except WebDriverException:
+            summary = run_account(dict_key, login_dict[dict_key], parser, search_list, email_links,
+                                  prewarm_next=parser.prewarm and dict_key != login_dict_keys[-1])
+            if summary is not None:
+                result['accounts'].append(summary)
+    except WebDriverException as e:
         logging.exception(msg='Failure at main()')
+        result['error'] = str(e)
+    except Exception as e:
+        # a single run fails loudly, the daemon records the error and keeps its schedule
+        if not parser.daemon:
+            raise
+        logging.exception(msg='Run failed, waiting for the next scheduled run.')
+        result['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        write_metrics(run_started)
+        if PROFILE_DIR is not None:
+            log_profile_summary()
+        result['finished'] = datetime.now().isoformat(timespec='seconds')
+    return result
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """
+    Serves the daemon status as json on any path
+    """
+    def do_GET(self):
+        body = json.dumps(daemon_status, indent=2).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format_, *args):
+        logging.debug(msg=f'status endpoint: {format_ % args}')
+
+
+class StatusServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_status_server(port):
+    """
+    Serves daemon_status on localhost from a background thread
+    :param port: Int port, 0 to not serve it
+    :return: None
+    """
+    if not port:
+        return
+    server = StatusServer(('127.0.0.1', port), StatusHandler)
+    threading.Thread(target=server.serve_forever, name='status_server', daemon=True).start()
+    logging.info(msg=f'Status endpoint on http://127.0.0.1:{port}/')
+
+
+def next_run_time(now, reset_hour, run_window):
+    """
+    Gets a random time within the run window after the next daily reset
+    :param now: datetime
+    :param reset_hour: Int local hour the points reset
+    :param run_window: Float minutes after the reset to pick from
+    :return: datetime
+    """
+    reset = now.replace(hour=reset_hour, minute=0, second=0, microsecond=0)
+    if reset <= now:
+        reset += timedelta(days=1)
+    return reset + timedelta(minutes=random.uniform(0, run_window))
+
+
+def sleep_until(when):
+    """
+    Sleeps until a datetime, returns right away if it has passed
+    :param when: datetime
+    :return: None
+    """
+    time.sleep(max(0.0, (when - datetime.now()).total_seconds()))
+
+
+def run_daemon(parser):
+    """
+    Runs all accounts right away, then once a day after the reset, staying resident between runs.
+    Search terms and the first browser are started DAEMON_PREWARM_LEAD seconds before each run.
+    :param parser: argparse object
+    :return: None
+    """
+    start_status_server(parser.status_port)
+    # the first run starts now, the journal skips whatever already ran today
+    next_run = datetime.now()
+    first_user_agent = MOBILE_USER_AGENT if parser.mobile_mode else PC_USER_AGENT
+    while True:
+        daemon_status.update(state='waiting', next_run=next_run.isoformat(timespec='seconds'))
+        logging.info(msg=f'Next run at {next_run:%Y-%m-%d %H:%M:%S}')
+        sleep_until(next_run - timedelta(seconds=DAEMON_PREWARM_LEAD))
+        if parser.profile:
+            # the term fetch starts early, profile it with the run it is for
+            start_profiling(next_run)
+        search_list = None
+        if parser.mobile_mode or parser.pc_mode:
+            search_list = prefetch_search_terms(parser.geo, parser.cache_ttl * 3600)
+        prewarm_browser(parser.headless_setting, first_user_agent)
+        sleep_until(next_run)
+
+        daemon_status['state'] = 'running'
+        daemon_status['last_run'] = run_once(parser, next_run, search_list)
+        # a browser warmed for an account that turned out to be done already would idle until tomorrow
+        quit_warm_browsers()
+        # spans and search metrics were written for this run, start the next one clean
+        SPANS.clear()
+        SEARCH_METRICS.clear()
+        ROUND_TRIPS.clear()
+        RECOVERY_COUNTS.clear()
+        phase_errors.clear()
+        next_run = next_run_time(datetime.now(), parser.reset_hour, parser.run_window)
+
+
+if __name__ == '__main__':
+    run_started = datetime.now()
+    try:
+        # start logging
+        init_logging()
+        logging.info(msg='---------------------------------')
+        logging.info(msg='--------------New----------------')
+        logging.info(msg='---------------------------------')
+
+        # argparse
+        parser = parse_args()
+        MIN_PACE = parser.min_pace
+        LEAN_MODE = parser.lean
+        LOW_MEMORY_MODE = parser.low_memory
+        MAX_RSS = parser.max_rss * 2 ** 20
+        BROWSER_BACKEND = parser.browser
+        if parser.endpoints_path:
+            set_endpoints(parser.endpoints_path)
+        logging.info(msg='args parsed.')
+        start_rss_watchdog()
+        if parser.profile:
+            tracemalloc.start(PROFILE_FRAMES)
+
+        if parser.daemon:
+            run_daemon(parser)
+        else:
+            run_once(parser, run_started)
+    finally:
+        watchdog_stop.set()
+        quit_warm_browsers()
+        stop_screenshot_writer()
+        stop_logging()
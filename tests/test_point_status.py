@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import ms_rewards  # noqa: E402
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_saved_flyout():
+    status = ms_rewards.parse_point_status(read_fixture('point_flyout.html'))
+    assert status == {'total': 12345, 'pc': [150, 150], 'mobile': [35, 100], 'edge': [0, 20]}
+
+
+def test_nested_markup_keeps_first_element_per_class():
+    html = ('<div class="credits2"><div><span>1,010</span></div> of <i>6,500</i></div>'
+            '<p class="pcsearch"><span>5<br>/</span>150</p><p class="pcsearch">999/999</p>'
+            '<p class="mobilesearch">10/100</p><p class="edgesearch">0/20</p>')
+    status = ms_rewards.parse_point_status(html)
+    assert status == {'total': 1010, 'pc': [5, 150], 'mobile': [10, 100], 'edge': [0, 20]}
+
+
+def test_thousands_separators():
+    html = ('<span class="credits2">1,234,567 of 2,000,000</span><span class="pcsearch">1,050/1,500</span>'
+            '<span class="mobilesearch">0/100</span><span class="edgesearch">0/20</span>')
+    status = ms_rewards.parse_point_status(html)
+    assert status['total'] == 1234567
+    assert status['pc'] == [1050, 1500]
+
+
+def test_missing_class():
+    html = read_fixture('point_flyout.html').replace('edgesearch', 'bonus')
+    with pytest.raises(ValueError, match='edgesearch'):
+        ms_rewards.parse_point_status(html)
+
+
+class FakeBrowser:
+    def __init__(self, cookies):
+        self.cookies = cookies
+
+    def execute_script(self, script):
+        return 'test agent'
+
+    def get_cookies(self):
+        return self.cookies
+
+
+def test_status_session_keeps_secure_cookies_off_http(monkeypatch):
+    cookies = [{'name': '_U', 'value': 'secret', 'domain': '.bing.com', 'path': '/', 'secure': True, 'httpOnly': True},
+               {'name': 'SRCHD', 'value': 'AF=NOFORM', 'domain': '.bing.com', 'path': '/', 'secure': False}]
+    monkeypatch.setattr(ms_rewards, 'browser', FakeBrowser(cookies))
+    monkeypatch.setattr(ms_rewards, 'status_session', None)
+    session = ms_rewards.seed_status_session()
+
+    def sent_cookies(url):
+        return session.prepare_request(requests.Request('GET', url)).headers.get('Cookie', '')
+
+    assert sent_cookies('http://www.bing.com/rewardsapp/bepflyoutpage') == 'SRCHD=AF=NOFORM'
+    assert '_U=secret' in sent_cookies('https://www.bing.com/rewardsapp/bepflyoutpage')
+    assert ms_rewards.POINT_TOTAL_URL.startswith('https://')
@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import ms_rewards  # noqa: E402
+
+
+def status(pc=(0, 150), mobile=(0, 100), edge=(0, 20), total=1000):
+    return {'total': total, 'pc': list(pc), 'mobile': list(mobile), 'edge': list(edge)}
+
+
+def test_searches_needed_pc_plans_on_larger_of_pc_and_edge():
+    assert ms_rewards.searches_needed(status()) == 30
+    assert ms_rewards.searches_needed(status(pc=(150, 150), edge=(5, 20))) == 3
+    assert ms_rewards.searches_needed(status(pc=(148, 150), edge=(20, 20))) == 1
+
+
+def test_searches_needed_mobile():
+    assert ms_rewards.searches_needed(status(mobile=(35, 100)), mobile_search=True) == 13
+    assert ms_rewards.searches_needed(status(mobile=(100, 100)), mobile_search=True) == 0
+
+
+def test_searches_needed_never_negative():
+    assert ms_rewards.searches_needed(status(pc=(160, 150), edge=(25, 20))) == 0
+
+
+def test_pc_gain_counts_edge_searches_once():
+    gained = ms_rewards.search_gain(status(), status(pc=(150, 150), edge=(20, 20)))
+    assert gained == 150
+    # 30 searches were needed for the 150 + 20 target, 33 were issued
+    assert ms_rewards.wasted_searches(33, gained) == 3
+
+
+def test_mobile_gain_includes_blind_searches():
+    after = status(mobile=(5, 100))
+    before = ms_rewards.status_before_searches(after, 1)
+    gained = ms_rewards.search_gain(before, after, mobile_search=True)
+    assert gained == 5
+    assert ms_rewards.wasted_searches(1, gained) == 0
+
+
+def test_blind_searches_estimate_stops_at_zero():
+    before = ms_rewards.status_before_searches(status(pc=(50, 150), edge=(20, 20)), 30)
+    assert before['pc'] == [0, 150]
+    assert before['edge'] == [0, 20]
+    assert before['total'] == 1000
+
+
+def test_wasted_searches_never_negative():
+    assert ms_rewards.wasted_searches(10, 100) == 0
+    assert ms_rewards.wasted_searches(10, 0) == 10